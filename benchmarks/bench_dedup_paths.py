@@ -0,0 +1,88 @@
+"""
+Confere que as duas versões da deduplicação semântica dão a mesma saída:
+deduplicate_semantically (arquivo inteiro em memória) e
+deduplicate_jsonl_file (em fluxo, lotes de 'batch_size' blocos).
+
+Os JSONL de data/output já saíram deduplicados (blocos curtos primeiro), então
+os blocos voltam antes para a ordem de extração (número em bloco_id, "-b<n>"),
+com curtos e longos misturados como no arquivo que a deduplicação recebe.
+Cada arquivo passa pelas duas versões, cada uma com o seu índice global e o
+seu pré-filtro (como no notebook, compartilhados entre os arquivos). Para
+cada arquivo mostra o tempo das duas versões e se os blocos gravados
+(conteúdo e ordem) são os mesmos.
+
+Uso:
+    python benchmarks/bench_dedup_paths.py [modelo] [batch_size] [limiar]
+"""
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+from deduplicate import deduplicate_jsonl_file, deduplicate_semantically, get_semantic_model
+from embedding_index import EmbeddingIndex
+from minhash import TextPrefilter
+
+
+def load_blocks(path: str) -> list[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def extraction_order(blocks: list[dict]) -> list[dict]:
+    """Ordena pelo número do bloco em bloco_id ("<doc>-p<página>-b<n>")."""
+    def numero(item):
+        i, block = item
+        _, sep, n = str(block.get("bloco_id") or "").rpartition("-b")
+        return int(n) if sep and n.isdigit() else i
+    return [block for _, block in sorted(enumerate(blocks), key=numero)]
+
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "sentence-transformers/all-MiniLM-L6-v2"
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 0.85
+    model = get_semantic_model(model_name)
+    paths = sorted(glob.glob(str(ROOT / 'data' / 'output' / '*.jsonl')))
+    print(f"{len(paths)} arquivos | batch_size={batch_size} | limiar={threshold}")
+
+    index_memoria, prefiltro_memoria = EmbeddingIndex(), TextPrefilter()
+    index_fluxo, prefiltro_fluxo = EmbeddingIndex(), TextPrefilter()
+    divergentes = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in paths:
+            blocks = extraction_order(load_blocks(path))
+            entrada = os.path.join(tmp, "entrada.jsonl")
+            with open(entrada, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(block, ensure_ascii=False) + "\n" for block in blocks)
+
+            inicio = time.perf_counter()
+            mantidos, index_memoria = deduplicate_semantically(
+                blocks, model, index_memoria, threshold=threshold, prefilter=prefiltro_memoria
+            )
+            t_memoria = time.perf_counter() - inicio
+
+            saida = os.path.join(tmp, os.path.basename(path))
+            inicio = time.perf_counter()
+            _, gravados, index_fluxo = deduplicate_jsonl_file(
+                entrada, saida, model, index_fluxo, threshold=threshold,
+                batch_size=batch_size, prefilter=prefiltro_fluxo
+            )
+            t_fluxo = time.perf_counter() - inicio
+
+            iguais = load_blocks(saida) == mantidos
+            divergentes += not iguais
+            print(f"{os.path.basename(path)}: {len(blocks)} blocos -> {len(mantidos)} (memória, {t_memoria:.1f}s) | "
+                  f"{gravados} (fluxo, {t_fluxo:.1f}s) | saída {'igual' if iguais else 'DIFERENTE'}")
+
+    print("Mesma saída nas duas versões." if not divergentes else f"{divergentes} arquivo(s) com saída diferente.")
+
+
+if __name__ == "__main__":
+    main()
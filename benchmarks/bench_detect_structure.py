@@ -0,0 +1,86 @@
+"""
+Benchmark de detect_structure.iter_structure: classificador com uma regex
+combinada e pré-compilada (regras_classificacao.ClassificadorEstrutural)
+contra a versão original, com dois re.match de padrões inline por bloco.
+
+Usa os blocos de texto do Regimento Geral inteiro (extract_raw) e confere
+que as duas versões produzem exatamente a mesma estrutura.
+
+Uso:
+    python benchmarks/bench_detect_structure.py [caminho/do/regimento.pdf] [repeticoes]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+from extract_raw import extract_raw
+from detect_structure import iter_structure
+
+DEFAULT_PDF = ROOT / 'data' / 'input' / 'REGIMENTO_GERAL_FEVEREIRO_DE_2025.pdf'
+
+
+def legacy_iter_structure(text_blocks):
+    """iter_structure original: padrões inline testados um a um em cada bloco."""
+    current_article = None
+    for block in text_blocks:
+        line = block["text"].strip()
+        page_num = block["page"]
+        if not line:
+            continue
+        match_artigo = re.match(r"^(art\.?\s*\d+º?)(.*)", line, re.IGNORECASE)
+        if match_artigo:
+            new_article = {"tipo": "artigo", "titulo": match_artigo.group(1).capitalize(), "paragrafos": []}
+            artigo_texto = match_artigo.group(2).strip()
+            if artigo_texto:
+                new_article["paragrafos"].append({"numero": None, "texto": artigo_texto, "pagina": page_num})
+            if current_article:
+                yield current_article
+            current_article = new_article
+            continue
+        match_paragrafo = re.match(r"^(§\s*\d+º|parágrafo único|\b[ivxlcdm]+\s*[-–—])\s*(.*)", line, re.IGNORECASE)
+        if match_paragrafo:
+            paragraph_number = match_paragrafo.group(1).strip()
+            paragraph_text = match_paragrafo.group(2).strip()
+            if current_article:
+                current_article["paragrafos"].append({"numero": paragraph_number, "texto": paragraph_text, "pagina": page_num})
+            else:
+                yield {"tipo": "paragrafo", "titulo": None, "numero": paragraph_number, "texto": paragraph_text, "pagina": page_num}
+            continue
+        if current_article:
+            current_article["paragrafos"].append({"numero": None, "texto": line, "pagina": page_num})
+        else:
+            yield {"tipo": "paragrafo", "titulo": None, "numero": None, "texto": line, "pagina": page_num}
+    if current_article:
+        yield current_article
+
+
+def _tempo(funcao, blocos, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = list(funcao(blocos))
+    return (time.perf_counter() - inicio) / repeticoes, resultado
+
+
+def main():
+    pdf_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PDF
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"Extraindo blocos de '{pdf_path.name}'...")
+    blocos = extract_raw(str(pdf_path))
+    # Uma linha por bloco também (o pior caso: muito mais chamadas de match)
+    linhas = [{"text": linha, "page": b["page"]} for b in blocos for linha in b["text"].split("\n")]
+
+    for nome, entrada in (("blocos", blocos), ("linhas", linhas)):
+        t_antigo, antigo = _tempo(legacy_iter_structure, entrada, repeticoes)
+        t_novo, novo = _tempo(iter_structure, entrada, repeticoes)
+        assert antigo == novo, f"Estruturas diferentes ({nome})"
+        print(f"{nome}: {len(entrada)} entradas | original {t_antigo * 1000:.2f} ms | "
+              f"regex combinada {t_novo * 1000:.2f} ms | speedup {t_antigo / t_novo:.2f}x | saídas iguais")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark dos backends de embedding na CPU (encoder_backend.load_sentence_encoder):
+PyTorch fp32 (referência), PyTorch int8 (quantização dinâmica) e ONNX Runtime.
+
+Codifica os blocos dos JSONL de data/output (texto_normalizado com 50+
+caracteres, como na deduplicação semântica) e mede, para cada backend:
+  - vazão (sentenças/s);
+  - desvio em relação ao fp32: cosseno entre o embedding do backend e o do
+    fp32 para o mesmo texto (média e mínimo);
+  - concordância das decisões de deduplicação (limiar 0.95) com o fp32.
+
+Uso:
+    python benchmarks/bench_encoder_backends.py [modelo] [max_textos] [threads]
+    (ex: modelo neuralmind/bert-base-portuguese-cased para o encoder do RAG)
+"""
+import glob
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+from embedding_index import EmbeddingIndex
+from encoder_backend import BACKENDS, encode_normalized, load_sentence_encoder
+
+THRESHOLD = 0.95
+MIN_LENGTH = 50
+
+
+def load_corpus(max_texts: int) -> list[str]:
+    texts = []
+    for path in sorted(glob.glob(str(ROOT / 'data' / 'output' / '*.jsonl'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                text = json.loads(line).get("texto_normalizado") or ""
+                if len(text) >= MIN_LENGTH:
+                    texts.append(text)
+    return texts[:max_texts]
+
+
+def dedup_mask(vectors: np.ndarray) -> np.ndarray:
+    return EmbeddingIndex(backend="numpy").add_if_new(vectors, THRESHOLD)
+
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "sentence-transformers/all-MiniLM-L6-v2"
+    max_texts = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    texts = load_corpus(max_texts)
+    print(f"{len(texts)} textos | modelo {model_name} | threads={threads or 'padrão'}")
+
+    baseline = None
+    baseline_mask = None
+    for backend in BACKENDS:
+        try:
+            model = load_sentence_encoder(model_name, backend=backend, threads=threads, device="cpu")
+        except Exception as e:
+            print(f"{backend}: não foi possível carregar ({e})")
+            continue
+        encode_normalized(model, texts[:32])  # aquecimento (export/otimização do grafo)
+
+        inicio = time.perf_counter()
+        vectors = encode_normalized(model, texts)
+        elapsed = time.perf_counter() - inicio
+        mask = dedup_mask(vectors)
+
+        line = f"{backend}: {len(texts) / elapsed:.1f} sentenças/s"
+        if baseline is None:
+            baseline, baseline_mask, baseline_time = vectors, mask, elapsed
+            line += f" (referência) | {int((~mask).sum())} duplicatas"
+        else:
+            cos = np.sum(vectors * baseline, axis=1)
+            iguais = int((mask == baseline_mask).sum())
+            line += (f" | speedup {baseline_time / elapsed:.2f}x | cosseno com fp32: "
+                     f"médio {cos.mean():.4f}, mínimo {cos.min():.4f} | "
+                     f"mesma decisão de dedup em {iguais}/{len(texts)}")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark da extração de metadados (título, datas e número de páginas) de
+todos os PDFs de data/input:
+  - original: pypdf.PdfReader + reader.metadata + len(reader.pages), que monta
+    a lista de todas as páginas;
+  - sonda:    enrich_metadata.probe_pdf_metadata (trailer, /Info e /Count);
+  - sessão:   PdfDocumentSession.metadata + page_count antes de montar as páginas.
+Confere que os três dão o mesmo título, datas e contagem de páginas.
+
+Uso:
+    python benchmarks/bench_metadata_probe.py [repeticoes]
+"""
+import glob
+import sys
+import time
+from pathlib import Path
+
+from pypdf import PdfReader
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+from enrich_metadata import _info_value, probe_pdf_metadata
+from pdf_session import PdfDocumentSession
+
+KEYS = ("Title", "Subject", "CreationDate", "ModDate")
+
+
+def original(path):
+    reader = PdfReader(path)
+    return reader.metadata or {}, len(reader.pages)
+
+
+def sessao(path):
+    with PdfDocumentSession(path) as session:
+        return session.metadata, session.page_count
+
+
+def summary(info, page_count):
+    return tuple(str(_info_value(info, key) or "") for key in KEYS), page_count
+
+
+def timed(fn, path, repeats):
+    inicio = time.perf_counter()
+    for _ in range(repeats):
+        result = fn(path)
+    return (time.perf_counter() - inicio) / repeats, summary(*result)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    pdfs = sorted(glob.glob(str(ROOT / 'data' / 'input' / '*.pdf')))
+    totals = {"original": 0.0, "sonda": 0.0, "sessão": 0.0}
+    iguais = 0
+    for path in pdfs:
+        t_orig, ref = timed(original, path, repeats)
+        t_probe, probe = timed(probe_pdf_metadata, path, repeats)
+        t_sess, sess = timed(sessao, path, repeats)
+        totals["original"] += t_orig
+        totals["sonda"] += t_probe
+        totals["sessão"] += t_sess
+        same = probe == ref and sess[1] == ref[1]
+        iguais += same
+        print(f"{Path(path).name[:40]:<40} {ref[1]:>4} págs | original {t_orig * 1000:7.1f}ms | "
+              f"sonda {t_probe * 1000:6.1f}ms | sessão {t_sess * 1000:6.1f}ms | {'ok' if same else 'DIFERENTE'}")
+
+    print(f"\nTotal ({len(pdfs)} PDFs): " + " | ".join(f"{nome} {t * 1000:.1f}ms" for nome, t in totals.items()))
+    print(f"Speedup da sonda: {totals['original'] / totals['sonda']:.1f}x | resultados iguais em {iguais}/{len(pdfs)}")
+
+
+if __name__ == "__main__":
+    main()
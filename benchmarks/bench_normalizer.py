@@ -0,0 +1,127 @@
+"""
+Benchmark de normalize_text.CompiledNormalizer contra o laço original
+(uma re.sub por chave do dicionário).
+
+Usa um dicionário sintético de 5 mil entradas (siglas + termos) somado ao
+data/input/dicionarios.json e textos reais de data/output/*.jsonl (ou
+sintéticos, se não houver saídas).
+
+Antes do benchmark, confere que a passada única e o laço original dão a mesma
+saída com os dicionários de data/input em todos os textos: as duas versões só
+divergem em chaves sobrepostas ou reexpansões (ver CompiledNormalizer).
+
+Uso:
+    python benchmarks/bench_normalizer.py
+"""
+import re
+import sys
+import json
+import time
+import glob
+import random
+import string
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+from unidecode import unidecode
+from normalize_text import CompiledNormalizer
+
+
+def legacy_normalize(raw_text: str, acronyms: dict, standardization_map: dict) -> str:
+    """normalize_text original: uma re.sub (com regex nova) por chave."""
+    normalized_text = re.sub(r'-\n\s*', '', raw_text)
+    normalized_text = normalized_text.replace('\n', ' ')
+    combined_map = {**standardization_map, **acronyms}
+    for key in sorted(combined_map.keys(), key=len, reverse=True):
+        pattern = r'\b' + re.escape(key) + r'\b'
+        normalized_text = re.sub(pattern, combined_map[key], normalized_text, flags=re.IGNORECASE)
+    normalized_text = unidecode(normalized_text.lower())
+    normalized_text = normalized_text.translate(str.maketrans('', '', string.punctuation))
+    return re.sub(r'\s+', ' ', normalized_text).strip()
+
+
+def synthetic_dictionaries(n_entries: int, seed: int = 0) -> tuple[dict, dict]:
+    rng = random.Random(seed)
+    acronyms, standardization = {}, {}
+    while len(acronyms) + len(standardization) < n_entries:
+        if rng.random() < 0.5:
+            sigla = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 6)))
+            acronyms[sigla] = f"expansao da sigla {sigla.lower()}"
+        else:
+            termo = " ".join(
+                "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                for _ in range(rng.randint(1, 2))
+            )
+            standardization[termo] = f"termo padronizado {len(standardization)}"
+    return acronyms, standardization
+
+
+def load_texts(limit: int = 2000) -> list[str]:
+    texts = []
+    for path in sorted(glob.glob(str(ROOT / 'data' / 'output' / '*.jsonl'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                text = data.get("texto_bruto") if isinstance(data, dict) else None
+                if text:
+                    texts.append(text)
+    if not texts:
+        rng = random.Random(1)
+        words = ["aluno", "curso", "PPC", "IFNMG", "discente", "estágio", "Art.", "§ 1º", "horas"]
+        texts = [" ".join(rng.choice(words) for _ in range(80)) for _ in range(limit)]
+    return texts[:limit] if limit else texts
+
+
+def check_shipped_dictionaries(real: dict):
+    """Compara CompiledNormalizer e o laço original em todos os textos, com os dicionários reais."""
+    acronyms, standardization = real.get("acronyms", {}), real.get("standardization_map", {})
+    normalizer = CompiledNormalizer(acronyms, standardization)
+    texts = load_texts(limit=None)
+    diferentes = [t for t in texts if normalizer.normalize(t) != legacy_normalize(t, acronyms, standardization)]
+    print(f"Dicionários de data/input: saídas iguais em {len(texts) - len(diferentes)}/{len(texts)} textos")
+    for text in diferentes[:3]:
+        print(f"   Diferente: '{text[:80]}...'")
+    return not diferentes
+
+
+def main():
+    with open(ROOT / 'data' / 'input' / 'dicionarios.json', 'r', encoding='utf-8') as f:
+        real = json.load(f)
+    if not check_shipped_dictionaries(real):
+        sys.exit(1)
+
+    acronyms, standardization = synthetic_dictionaries(5_000)
+    acronyms.update(real.get("acronyms", {}))
+    standardization.update(real.get("standardization_map", {}))
+    texts = load_texts()
+    n_chars = sum(len(t) for t in texts)
+    print(f"Dicionário: {len(acronyms) + len(standardization)} entradas | {len(texts)} textos ({n_chars} caracteres)")
+
+    start = time.perf_counter()
+    normalizer = CompiledNormalizer(acronyms, standardization)
+    t_compile = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [normalizer.normalize(t) for t in texts]
+    t_compiled = time.perf_counter() - start
+
+    # O laço original é lento demais para o corpus inteiro: mede uma amostra e extrapola
+    sample = texts[:50]
+    start = time.perf_counter()
+    legacy = [legacy_normalize(t, acronyms, standardization) for t in sample]
+    t_legacy = (time.perf_counter() - start) * len(texts) / len(sample)
+
+    iguais = sum(a == b for a, b in zip(legacy, compiled))
+    print(f"Compilação do normalizador: {t_compile:.3f}s")
+    print(f"Original (re.sub por chave, extrapolado): {t_legacy:.2f}s")
+    print(f"CompiledNormalizer (uma passada):         {t_compiled:.2f}s")
+    print(f"Speedup: {t_legacy / t_compiled:.1f}x | saídas iguais na amostra: {iguais}/{len(sample)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark de extract_raw._group_words_into_lines.
+
+Compara a versão com bisect contra o agrupamento original (cada word contra
+todas as linhas já encontradas) em páginas sintéticas de 5k a 50k words,
+e confere que a saída é idêntica.
+
+Uso:
+    python benchmarks/bench_reconstruct_lines.py
+"""
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'src'))
+
+from extract_raw import _group_words_into_lines
+
+
+def _legacy_group_words_into_lines(words, y_tol=3):
+    """Algoritmo original, O(words × linhas)."""
+    lines_map = []
+    for w in words:
+        y = float(w.get("top") or w.get("doctop") or 0)
+        x = float(w.get("x0") or 0)
+        text = w.get("text", "")
+
+        placed = False
+        for idx, (y_ref, items) in enumerate(lines_map):
+            if abs(y_ref - y) <= y_tol:
+                items.append((x, text))
+                placed = True
+                break
+        if not placed:
+            lines_map.append((y, [(x, text)]))
+
+    lines_map.sort(key=lambda p: p[0])
+    lines = []
+    for _, items in lines_map:
+        items.sort(key=lambda it: it[0])
+        line = " ".join(t for _, t in items).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def synthetic_page(n_words: int, words_per_line: int = 10, seed: int = 0) -> list[dict]:
+    """
+    Página sintética "densa": linhas a cada ~4pt com jitter vertical,
+    words embaralhadas (como sai de páginas escaneadas / com tabelas).
+    """
+    rng = random.Random(seed)
+    words = []
+    n_lines = max(1, n_words // words_per_line)
+    for i in range(n_words):
+        line = i % n_lines
+        top = line * 4.0 + rng.uniform(-1.2, 1.2)
+        x0 = (i // n_lines) * 50.0 + rng.uniform(0, 5)
+        words.append({"text": f"w{i}", "top": top, "x0": x0})
+    rng.shuffle(words)
+    return words
+
+
+def _time(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'words':>8} {'linhas':>8} {'original (s)':>14} {'bisect (s)':>12} {'speedup':>9}")
+    for n_words in (5_000, 10_000, 20_000, 50_000):
+        words = synthetic_page(n_words)
+        expected = _legacy_group_words_into_lines(words)
+        got = _group_words_into_lines(words)
+        assert got == expected, f"Saída diferente para {n_words} words"
+
+        repeat = 1 if n_words >= 20_000 else 3
+        t_legacy = _time(_legacy_group_words_into_lines, words, repeat=repeat)
+        t_new = _time(_group_words_into_lines, words, repeat=repeat)
+        print(f"{n_words:>8} {len(expected):>8} {t_legacy:>14.3f} {t_new:>12.3f} {t_legacy / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark do índice incremental de deduplicação semântica
+(embedding_index.EmbeddingIndex) contra o esquema original de
+deduplicate_semantically: lista de embeddings empilhada a cada arquivo e
+similaridade de cossenos completa entre os blocos novos e TODOS os já vistos,
+com a verificação de duplicata linha a linha.
+
+Usa embeddings sintéticos (vetores aleatórios normalizados, com ~10% de
+cópias ruidosas de blocos anteriores) chegando em "arquivos" de tamanho fixo,
+até passar de 100 mil blocos. Confere que o índice exato escolhe os mesmos
+blocos que o esquema original.
+
+Uso:
+    python benchmarks/bench_semantic_index.py [total_blocos] [blocos_por_arquivo] [dim]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+from embedding_index import EmbeddingIndex, faiss, normalize_rows
+
+THRESHOLD = 0.85
+
+
+def synthetic_batches(total: int, batch: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    history = []
+    for start in range(0, total, batch):
+        vectors = rng.standard_normal((min(batch, total - start), dim), dtype=np.float32)
+        if history:
+            # ~10% de quase-duplicatas de blocos de arquivos anteriores
+            n_dup = len(vectors) // 10
+            previous = np.concatenate(history)
+            source = previous[rng.integers(0, len(previous), n_dup)]
+            vectors[:n_dup] = source + 0.01 * rng.standard_normal(source.shape, dtype=np.float32)
+        vectors = normalize_rows(vectors)
+        history.append(vectors[:50])
+        yield vectors
+
+
+def legacy_dedup(batches) -> tuple[float, list]:
+    """Esquema original: lista de vetores, np.stack + cos_sim completo por arquivo."""
+    seen = []
+    kept = []
+    inicio = time.perf_counter()
+    for vectors in batches:
+        if not seen:
+            seen.extend(vectors)
+            kept.append(np.ones(len(vectors), dtype=bool))
+            continue
+        existing = np.stack(seen)
+        similarities = vectors @ existing.T
+        unique = np.zeros(len(vectors), dtype=bool)
+        to_add = []
+        for i in range(len(vectors)):
+            if not np.any(similarities[i] > THRESHOLD):
+                unique[i] = True
+                to_add.append(vectors[i])
+        seen.extend(to_add)
+        kept.append(unique)
+    return time.perf_counter() - inicio, kept
+
+
+def index_dedup(batches, **index_kwargs) -> tuple[float, list]:
+    index = EmbeddingIndex(**index_kwargs)
+    kept = []
+    inicio = time.perf_counter()
+    for vectors in batches:
+        if not len(index):
+            index.add(vectors)
+            kept.append(np.ones(len(vectors), dtype=bool))
+            continue
+        unique = index.max_similarity(vectors) <= THRESHOLD
+        index.add(vectors[unique])
+        kept.append(unique)
+    return time.perf_counter() - inicio, kept
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 110_000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    dim = int(sys.argv[3]) if len(sys.argv) > 3 else 384
+    batches = list(synthetic_batches(total, batch, dim))
+    print(f"{total} blocos em {len(batches)} arquivos de {batch} | dim={dim}")
+
+    t_legacy, kept_legacy = legacy_dedup(batches)
+    removidos = sum(int((~k).sum()) for k in kept_legacy)
+    print(f"Original (lista + np.stack + cos_sim completo): {t_legacy:.1f}s | {removidos} duplicatas")
+
+    variantes = [("EmbeddingIndex auto (padrão)", {}),
+                 ("EmbeddingIndex numpy (exato)", {"backend": "numpy"})]
+    if faiss is not None:
+        variantes.append(("EmbeddingIndex faiss IndexFlatIP (exato)", {"backend": "faiss"}))
+        variantes.append(("EmbeddingIndex faiss HNSW M=32 (aproximado)", {"backend": "faiss", "hnsw_m": 32}))
+    else:
+        print("(faiss-cpu não instalado: só o backend NumPy será medido)")
+
+    for nome, kwargs in variantes:
+        t_index, kept_index = index_dedup(batches, **kwargs)
+        iguais = sum(int((a == b).sum()) for a, b in zip(kept_legacy, kept_index))
+        print(f"{nome}: {t_index:.1f}s | speedup {t_legacy / t_index:.1f}x | "
+              f"mesma decisão em {iguais}/{total} blocos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark da pré-varredura de tabelas (table_detection.find_table_pages) usada
+por extract_tables: compara o Camelot em todas as páginas (linha de base) com o
+Camelot só nas páginas marcadas e mede o recall da pré-varredura.
+
+Recall = tabelas (e páginas com tabela) da varredura completa que caem em
+páginas marcadas pela pré-varredura.
+
+Uso:
+    python benchmarks/bench_table_prescan.py [pdf ou diretório ...]
+"""
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+import camelot
+
+from pdf_session import PdfDocumentSession
+from table_detection import find_table_pages, pages_spec
+
+
+def camelot_tables(pdf_path: str, pages: str) -> list[tuple[int, list]]:
+    """(página, tabela) dos dois flavors, com o mesmo filtro de extract_tables."""
+    tables = []
+    for flavor in ('lattice', 'stream'):
+        try:
+            found = camelot.read_pdf(pdf_path, pages=pages, flavor=flavor, suppress_stdout=True)
+        except Exception as e:
+            # Mesmo tratamento de extract_tables: o flavor que falha não conta
+            print(f"Aviso: Erro ao extrair tabelas com flavor='{flavor}', páginas {pages}: {e}")
+            continue
+        for table in found:
+            data = table.df.values.tolist()
+            if len(data) > 1 and any(cell.strip() for row in data for cell in row):
+                tables.append((int(table.page), data))
+    return tables
+
+
+def _pdfs(argumentos: list[str]) -> list[Path]:
+    if not argumentos:
+        return sorted((ROOT / 'data' / 'input').glob('*.pdf'))
+    pdfs = []
+    for argumento in map(Path, argumentos):
+        pdfs.extend(sorted(argumento.glob('*.pdf')) if argumento.is_dir() else [argumento])
+    return pdfs
+
+
+def main():
+    total = {"paginas": 0, "marcadas": 0, "tabelas": 0, "recuperadas": 0,
+             "t_completo": 0.0, "t_varredura": 0.0, "t_alvo": 0.0}
+    for pdf in _pdfs(sys.argv[1:]):
+        with PdfDocumentSession(pdf) as session:
+            n_pages = session.page_count
+            inicio = time.perf_counter()
+            marcadas = find_table_pages(session)
+            t_varredura = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        completo = camelot_tables(str(pdf), 'all')
+        t_completo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        alvo = camelot_tables(str(pdf), pages_spec(marcadas)) if marcadas else []
+        t_alvo = time.perf_counter() - inicio
+
+        paginas_com_tabela = {page for page, _ in completo}
+        recuperadas = sum(1 for page, _ in completo if page in marcadas)
+        recall_tabelas = recuperadas / len(completo) if completo else 1.0
+        recall_paginas = len(paginas_com_tabela & set(marcadas)) / len(paginas_com_tabela) if paginas_com_tabela else 1.0
+        perdidas = sorted(paginas_com_tabela - set(marcadas))
+
+        print(f"{pdf.name}: {len(marcadas)}/{n_pages} páginas marcadas | "
+              f"tabelas {len(alvo)}/{len(completo)} | recall tabelas {recall_tabelas:.0%} páginas {recall_paginas:.0%} | "
+              f"completo {t_completo:.1f}s vs pré-varredura {t_varredura:.1f}s + alvo {t_alvo:.1f}s"
+              + (f" | páginas perdidas: {perdidas}" if perdidas else ""))
+
+        total["paginas"] += n_pages
+        total["marcadas"] += len(marcadas)
+        total["tabelas"] += len(completo)
+        total["recuperadas"] += recuperadas
+        total["t_completo"] += t_completo
+        total["t_varredura"] += t_varredura
+        total["t_alvo"] += t_alvo
+
+    if total["paginas"]:
+        recall = total["recuperadas"] / total["tabelas"] if total["tabelas"] else 1.0
+        t_novo = total["t_varredura"] + total["t_alvo"]
+        print(f"\nTotal: {total['marcadas']}/{total['paginas']} páginas marcadas | recall de tabelas {recall:.1%} | "
+              f"Camelot completo {total['t_completo']:.1f}s vs {t_novo:.1f}s "
+              f"(speedup {total['t_completo'] / t_novo:.1f}x)")
+        print("Obs.: extract_tables mantém pre_scan=False até o recall de tabelas chegar a 100% em data/input.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark do padding nos lotes de embeddings (encoder_backend.token_budget_batches),
+medido com o tokenizer DO MODELO (transformers.AutoTokenizer), sem rodar o modelo.
+
+Usa os textos da deduplicação semântica (texto_normalizado com 50+ caracteres
+dos JSONL de data/output) e compara:
+  - original:  ordem do arquivo, lotes fixos de 32 textos (o encode antigo);
+  - orçamento: textos ordenados por tokens, lotes de até 'max_tokens' com padding.
+Padding = 1 - tokens reais / (tamanho do lote x maior texto do lote).
+
+Não há estimativa por contagem de palavras aqui: sem o tokenizer (sem acesso
+ao Hugging Face Hub ou ao cache local), o script para com erro.
+
+Uso:
+    python benchmarks/bench_token_batches.py [modelo] [max_tokens]
+    (ex: modelo neuralmind/bert-base-portuguese-cased para o encoder do RAG)
+"""
+import glob
+import json
+import sys
+from pathlib import Path
+
+from transformers import AutoTokenizer
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+from encoder_backend import token_budget_batches
+
+MIN_LENGTH = 50
+ORIGINAL_BATCH_SIZE = 32
+
+
+def load_corpus() -> list[str]:
+    texts = []
+    for path in sorted(glob.glob(str(ROOT / 'data' / 'output' / '*.jsonl'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                text = json.loads(line).get("texto_normalizado") or ""
+                if len(text) >= MIN_LENGTH:
+                    texts.append(text)
+    return texts
+
+
+def padding(lengths: list[int], batches: list[list[int]]) -> tuple[float, int]:
+    tokens = sum(lengths)
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+    return 1 - tokens / padded, padded
+
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "sentence-transformers/all-MiniLM-L6-v2"
+    max_tokens = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    # Mesmo limite de truncamento do SentenceTransformer (max_seq_length do modelo)
+    max_length = min(tokenizer.model_max_length, 512)
+
+    texts = load_corpus()
+    lengths = [len(ids) for ids in tokenizer(texts, add_special_tokens=True, truncation=True,
+                                             max_length=max_length)["input_ids"]]
+    print(f"{len(texts)} textos | modelo {model_name} | {sum(lengths)} tokens reais")
+
+    original = [list(range(i, min(i + ORIGINAL_BATCH_SIZE, len(texts))))
+                for i in range(0, len(texts), ORIGINAL_BATCH_SIZE)]
+    budget = token_budget_batches(lengths, max_tokens=max_tokens)
+    for nome, batches in (("original (lotes de 32)", original), (f"orçamento ({max_tokens} tokens)", budget)):
+        frac, padded = padding(lengths, batches)
+        print(f"{nome}: {len(batches)} lotes, {padded} tokens com padding, {frac:.1%} de padding")
+
+
+if __name__ == "__main__":
+    main()
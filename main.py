@@ -1,40 +1,273 @@
 import os
 import sys
 import json
+import glob
+import time
+import argparse
+import traceback
+from itertools import tee
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 sys.path.append(str(Path(__file__).parent / 'src'))
 
-from extract_raw import extract_raw
-from normalize_text import normalize_text
-from detect_structure import detect_structure
-from extract_tables import extract_tables
-from deduplicate import deduplicate
+from extract_raw import extract_raw, iter_raw_blocks
+from normalize_text import normalize_batch, iter_normalize_text, configure_cache, get_cache
+from detect_structure import detect_structure, iter_structure
+from extract_tables import extract_tables, extract_tables_with_provenance
+from deduplicate import deduplicate, iter_deduplicate
 from enrich_metadata import enrich_metadata
+from pdf_session import PdfDocumentSession
 
-def main():
-    print("\n--- Pipeline de Processamento de Documentos --- ")
+INPUT_DIR = Path('data/input')
+OUTPUT_DIR = Path('data/output')
 
-    # --- Configuração de Diretórios ---
-    # Ajuste para o caminho correto, já que o script está em project/src/
-    input_dir = Path('data/input')
-    output_dir = Path('data/output')
-    
-    # Define o caminho para o arquivo de dicionários usando a variável 'input_dir' já criada.
-    dictionaries_path = input_dir / 'dicionarios.json'
 
-    # Cria diretórios se eles não existirem
-    input_dir.mkdir(parents=True, exist_ok=True)
-    output_dir.mkdir(parents=True, exist_ok=True)
+def carregar_dicionarios(dictionaries_path: Path) -> tuple[dict, dict]:
+    """
+    Carrega os dicionários de siglas e padronização (Equipe 2).
+    Retorna dicionários vazios se o arquivo não existir.
+    """
+    try:
+        with open(dictionaries_path, 'r', encoding='utf-8') as f:
+            dictionaries = json.load(f)
+        print("-> Dicionários de normalização carregados com sucesso.")
+        return dictionaries.get("acronyms", {}), dictionaries.get("standardization_map", {})
+    except FileNotFoundError:
+        print(f"-> AVISO: Arquivo '{dictionaries_path}' não encontrado. A normalização será limitada.")
+        return {}, {}
 
-    # --- Seleção de Arquivo ---
-    pdf_files = list(input_dir.glob('*.pdf'))
 
-    if not pdf_files:
-        print(f"\nERRO: Nenhum arquivo PDF encontrado no diretório '{input_dir}'.")
-        print("Por favor, coloque seus PDFs lá para que o programa possa encontrá-los.")
-        return
+def _custom_metadata(base_name: str) -> dict:
+    return {
+        "nome_doc": base_name.replace('_', ' ').replace('-', ' '),
+        "versao": "2023.1",
+        "data_publicacao": "2023-01-01"
+    }
+
+
+def _com_previa_normalizada(text_blocks, acronyms: dict, standardization_map: dict, tamanho_previa: int = 100):
+    """
+    Repassa os blocos adiante normalizando cada um no caminho (o tee guarda no
+    máximo um bloco); imprime a prévia assim que houver texto normalizado suficiente.
+    """
+    blocos, blocos_para_normalizar = tee(text_blocks)
+    previa = ""
+    for block, normalizado in zip(blocos, iter_normalize_text(blocos_para_normalizar, acronyms, standardization_map)):
+        if previa is not None:
+            previa = f"{previa} {normalizado}".strip()
+            if len(previa) >= tamanho_previa:
+                print(f"   Prévia: '{previa[:tamanho_previa]}...'")
+                previa = None
+        yield block
+    if previa:
+        print(f"   Prévia: '{previa}...'")
+
+
+def processar_pdf_stream(input_pdf_path: Path, output_dir: Path, acronyms: dict, standardization_map: dict) -> dict:
+    """
+    Versão em fluxo do pipeline: os blocos saem de iter_raw_blocks página a
+    página e atravessam normalização, estrutura e deduplicação sem que o
+    documento inteiro fique em memória. A saída é JSONL de verdade:
+    1ª linha com os metadados do documento, depois um elemento da estrutura
+    por linha e, ao final, uma linha por tabela.
+
+    A memória fica limitada porque iter_raw_blocks libera cada página da
+    sessão (page.close(), release_pages=True) assim que ela é extraída: os
+    metadados já foram lidos e as tabelas (Camelot) usam só o caminho do
+    arquivo. Nada aqui guarda páginas, blocos ou elementos além do necessário
+    para a etapa seguinte.
+    """
+    print(f"\nProcessando (fluxo): {input_pdf_path.name}\n")
+    base_name = input_pdf_path.stem
+    output_path = output_dir / f"{base_name}_output.jsonl"
+
+    with PdfDocumentSession(input_pdf_path) as session:
+        documento = enrich_metadata({}, session, _custom_metadata(base_name))
+
+        print("1-3. Extraindo, normalizando e detectando estrutura em fluxo...")
+        # Sequencial de propósito: só nesse modo as páginas são liberadas uma a uma.
+        # Esta é a última etapa que usa as páginas da sessão, então pode liberá-las
+        blocos = _com_previa_normalizada(iter_raw_blocks(session, release_pages=True), acronyms, standardization_map)
+        elementos = iter_deduplicate(iter_structure(blocos))
+
+        n_elementos = 0
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"registro": "documento", **documento}, ensure_ascii=False) + "\n")
+            for elemento in elementos:
+                f.write(json.dumps(elemento, ensure_ascii=False) + "\n")
+                n_elementos += 1
+
+            print("4. Extraindo tabelas...")
+            for tabela in extract_tables_with_provenance(session):
+                registro = {"registro": "tabela", "pagina": tabela["pagina"], "flavor": tabela["flavor"],
+                            "bbox": tabela["bbox"], "linhas": tabela["dados"]}
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    print(f"\nProcessamento concluído. {n_elementos} elementos salvos em '{output_path}'.")
+    return {"paginas": documento.get("pagina_final") or 0, "saida": str(output_path)}
+
+
+def processar_pdf(input_pdf_path: Path, output_dir: Path, acronyms: dict, standardization_map: dict) -> dict:
+    """
+    Executa o pipeline completo para UM PDF e salva o resultado em '<nome>_output.jsonl'.
+    Retorna um pequeno resumo (páginas processadas e caminho de saída).
+    """
+    print(f"\nProcessando: {input_pdf_path.name}\n")
+    base_name = input_pdf_path.stem
+
+    # --- Execução do Pipeline ---
+    # O PDF é aberto uma única vez e a sessão é compartilhada por todas as etapas
+    with PdfDocumentSession(input_pdf_path) as session:
+        print("1. Extraindo blocos de texto com metadados (página, bbox)...")
+        text_blocks = extract_raw(session)
+
+        # Normaliza todos os blocos de uma vez (o texto normalizado não é mais usado na detecção de estrutura)
+        print("2. Normalizando texto...")
+        normalized_blocks = normalize_batch([block["text"] for block in text_blocks], acronyms, standardization_map)
+        normalized_text = " ".join(t for t in normalized_blocks if t)
+        print(f"   Prévia: '{normalized_text[:100]}...'")
+
+        print("3. Detectando estrutura...")
+        # A função detect_structure agora recebe os blocos de texto com metadados
+        structured_content = detect_structure(session, text_blocks)
+
+        print("4. Extraindo tabelas...")
+        tables_data = extract_tables(session)
+
+        print("5. Deduplicando conteúdo...")
+        deduplicated_content = deduplicate(structured_content)
+
+        print("6. Enriquecendo com metadados...")
+        final_document = enrich_metadata(deduplicated_content, session, _custom_metadata(base_name))
+
+    if tables_data:
+        final_document["tables"] = tables_data
+
+    # --- Salvando o Resultado ---
+    output_path = output_dir / f"{base_name}_output.jsonl"
+    print(f"\nProcessamento concluído. Salvando resultados em '{output_path}'...")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(final_document, f, ensure_ascii=False, indent=4)
 
+    return {"paginas": final_document.get("pagina_final") or 0, "saida": str(output_path)}
+
+
+def _processar_pdf_isolado(input_pdf_path: str, output_dir: str, acronyms: dict, standardization_map: dict, stream: bool = False) -> dict:
+    """
+    Wrapper usado pelos workers do modo em lote: qualquer erro fica contido
+    no resultado deste arquivo e não interrompe os demais. O worker não grava
+    o cache de normalização: as entradas novas voltam em "cache_entradas" e o
+    processo principal grava o arquivo uma vez, no fim do lote.
+    """
+    inicio = time.perf_counter()
+    cache = get_cache()
+    hits, misses = cache.hits, cache.misses
+    resultado = {"arquivo": Path(input_pdf_path).name, "ok": False, "paginas": 0, "erro": None}
+    try:
+        processar = processar_pdf_stream if stream else processar_pdf
+        resumo = processar(Path(input_pdf_path), Path(output_dir), acronyms, standardization_map)
+        resultado.update(resumo)
+        resultado["ok"] = True
+    except Exception as e:
+        resultado["erro"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    resultado["tempo"] = time.perf_counter() - inicio
+    resultado["cache_hits"] = cache.hits - hits
+    resultado["cache_misses"] = cache.misses - misses
+    resultado["cache_entradas"] = cache.pop_new_entries()
+    return resultado
+
+
+def _imprimir_cache(hits: int, misses: int):
+    consultas = hits + misses
+    if consultas:
+        print(f"Cache de normalização: {hits}/{consultas} acertos ({hits / consultas:.0%})")
+
+
+def _resolver_entradas(entradas: list[str], input_dir: Path) -> list[Path]:
+    """
+    Converte a lista de arquivos/diretórios/globs da linha de comando em PDFs.
+    Sem entradas, usa todos os PDFs de 'input_dir'.
+    """
+    if not entradas:
+        return sorted(input_dir.glob('*.pdf'))
+
+    pdf_files = []
+    for entrada in entradas:
+        caminho = Path(entrada)
+        if caminho.is_dir():
+            pdf_files.extend(sorted(caminho.glob('*.pdf')))
+        elif caminho.is_file():
+            pdf_files.append(caminho)
+        else:
+            pdf_files.extend(Path(p) for p in sorted(glob.glob(entrada)) if p.lower().endswith('.pdf'))
+
+    # Remove repetidos mantendo a ordem
+    vistos = set()
+    unicos = []
+    for pdf_file in pdf_files:
+        chave = pdf_file.resolve()
+        if chave not in vistos:
+            vistos.add(chave)
+            unicos.append(pdf_file)
+    return unicos
+
+
+def executar_lote(pdf_files: list[Path], output_dir: Path, acronyms: dict, standardization_map: dict, workers: int = None, stream: bool = False, cache_path: str = None) -> list[dict]:
+    """
+    Modo em lote (não interativo): envia cada PDF para um pool de processos.
+    Cada arquivo é isolado, então uma falha não interrompe os outros.
+    Ao final imprime um resumo de vazão (páginas/s e documentos/s).
+    """
+    workers = workers or os.cpu_count() or 1
+    print(f"\nModo em lote: {len(pdf_files)} arquivo(s) com {workers} worker(s).")
+
+    inicio = time.perf_counter()
+    resultados = []
+    cache = get_cache()
+    if cache_path and cache.path != str(cache_path):
+        cache = configure_cache(path=cache_path)
+    # Cada worker lê o mesmo cache de normalização em disco (se houver); as
+    # entradas novas voltam nos resultados e são gravadas uma vez, aqui
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure_cache, initargs=(100_000, cache_path)) as executor:
+        futuros = {
+            executor.submit(_processar_pdf_isolado, str(pdf), str(output_dir), acronyms, standardization_map, stream): pdf
+            for pdf in pdf_files
+        }
+        for futuro in as_completed(futuros):
+            pdf = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # O worker morreu (ex: falta de memória) antes de devolver o resultado
+                resultado = {"arquivo": pdf.name, "ok": False, "paginas": 0, "tempo": 0.0, "erro": f"{type(e).__name__}: {e}",
+                             "cache_hits": 0, "cache_misses": 0}
+            cache.update(resultado.pop("cache_entradas", []))
+            status = "OK" if resultado["ok"] else f"FALHA ({resultado['erro']})"
+            print(f"  [{len(resultados) + 1}/{len(pdf_files)}] {resultado['arquivo']}: {status} em {resultado['tempo']:.1f}s")
+            resultados.append(resultado)
+    duracao = time.perf_counter() - inicio
+    cache.save()
+
+    sucessos = [r for r in resultados if r["ok"]]
+    falhas = [r for r in resultados if not r["ok"]]
+    total_paginas = sum(r["paginas"] for r in sucessos)
+
+    print("\n--- Resumo do Lote ---")
+    print(f"Documentos: {len(sucessos)} processados, {len(falhas)} com falha")
+    print(f"Páginas: {total_paginas}")
+    print(f"Tempo total: {duracao:.1f}s")
+    if duracao > 0:
+        print(f"Vazão: {total_paginas / duracao:.2f} páginas/s | {len(sucessos) / duracao:.2f} documentos/s")
+    _imprimir_cache(sum(r["cache_hits"] for r in resultados), sum(r["cache_misses"] for r in resultados))
+    for falha in falhas:
+        print(f"  FALHA: {falha['arquivo']} -> {falha['erro']}")
+
+    return resultados
+
+
+def _selecionar_interativo(pdf_files: list[Path]) -> Path:
     print("\nArquivos PDF disponíveis:")
     for i, pdf_file in enumerate(pdf_files):
         print(f"  {i+1}. {pdf_file.name}")
@@ -45,68 +278,70 @@ def main():
             if not choice_str: continue
             choice = int(choice_str)
             if 1 <= choice <= len(pdf_files):
-                input_pdf_path = pdf_files[choice - 1]
-                break
+                return pdf_files[choice - 1]
             else:
                 print("Escolha inválida. Por favor, digite um número da lista.")
         except ValueError:
             print("Entrada inválida. Por favor, digite um número.")
 
-    print(f"\nProcessando: {input_pdf_path.name}\n")
-    
-    # CORREÇÃO: A variável 'base_name' é definida aqui, logo após a escolha do arquivo.
-    base_name = input_pdf_path.stem
 
-    # --- Carregamento dos Dicionários (Equipe 2) ---
-    try:
-        with open(dictionaries_path, 'r', encoding='utf-8') as f:
-            dictionaries = json.load(f)
-        acronyms = dictionaries.get("acronyms", {})
-        standardization_map = dictionaries.get("standardization_map", {})
-        print("-> Dicionários de normalização carregados com sucesso.")
-    except FileNotFoundError:
-        print(f"-> AVISO: Arquivo '{dictionaries_path}' não encontrado. A normalização será limitada.")
-        acronyms = {}
-        standardization_map = {}
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de Processamento de Documentos")
+    parser.add_argument("arquivos", nargs="*",
+                        help="PDFs, diretórios ou globs a processar (implica --lote). Padrão: todos de data/input.")
+    parser.add_argument("--lote", action="store_true",
+                        help="Processa todos os PDFs sem perguntar nada (para agendadores).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de processos do modo em lote (padrão: número de CPUs).")
+    parser.add_argument("--stream", action="store_true",
+                        help="Processa em fluxo (memória limitada) e grava um elemento da estrutura por linha.")
+    parser.add_argument("--saida", default=str(OUTPUT_DIR), help="Diretório de saída.")
+    parser.add_argument("--cache-normalizacao", default=None, metavar="ARQUIVO",
+                        help="Arquivo JSON para persistir o cache de normalização entre execuções.")
+    return parser.parse_args(argv)
 
-    # --- Execução do Pipeline ---
-    print("\n1. Extraindo blocos de texto com metadados (página, bbox)...")
-    text_blocks = extract_raw(str(input_pdf_path))
 
-    # Concatena o texto para a normalização (o normalized_text não é mais usado na detecção de estrutura)
-    raw_text = " ".join(block["text"] for block in text_blocks)
+def main(argv=None):
+    args = _parse_args(argv)
+    print("\n--- Pipeline de Processamento de Documentos --- ")
 
-    print("2. Normalizando texto...")
-    normalized_text = normalize_text(raw_text, acronyms=acronyms, standardization_map=standardization_map)
-    print(f"   Prévia: '{normalized_text[:100]}...'")
+    # --- Configuração de Diretórios ---
+    input_dir = INPUT_DIR
+    output_dir = Path(args.saida)
 
-    print("3. Detectando estrutura...")
-    # A função detect_structure agora recebe os blocos de texto com metadados
-    structured_content = detect_structure(str(input_pdf_path), text_blocks)
+    # Define o caminho para o arquivo de dicionários usando a variável 'input_dir' já criada.
+    dictionaries_path = input_dir / 'dicionarios.json'
 
-    print("4. Extraindo tabelas...")
-    tables_data = extract_tables(str(input_pdf_path))
+    # Cria diretórios se eles não existirem
+    input_dir.mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-    print("5. Deduplicando conteúdo...")
-    deduplicated_content = deduplicate(structured_content) 
+    # --- Seleção de Arquivo ---
+    pdf_files = _resolver_entradas(args.arquivos, input_dir)
 
-    print("6. Enriquecendo com metadados...")
-    custom_metadata = {
-        "nome_doc": base_name.replace('_', ' ').replace('-', ' '),
-        "versao": "2023.1",
-        "data_publicacao": "2023-01-01" 
-    }
-    final_document = enrich_metadata(deduplicated_content, str(input_pdf_path), custom_metadata)
+    if not pdf_files:
+        print(f"\nERRO: Nenhum arquivo PDF encontrado no diretório '{input_dir}'.")
+        print("Por favor, coloque seus PDFs lá para que o programa possa encontrá-los.")
+        return
 
-    if tables_data:
-        final_document["tables"] = tables_data
+    # --- Carregamento dos Dicionários (Equipe 2) ---
+    acronyms, standardization_map = carregar_dicionarios(dictionaries_path)
+    # As entradas do cache são ligadas ao conteúdo dos dicionários, então editar
+    # o dicionarios.json invalida o cache automaticamente
+    cache = configure_cache(path=args.cache_normalizacao)
 
-    # --- Salvando o Resultado ---
-    output_filename = f"{base_name}_output.jsonl"
-    output_path = output_dir / output_filename
-    print(f"\nProcessamento concluído. Salvando resultados em '{output_path}'...")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(final_document, f, ensure_ascii=False, indent=4)
+    if args.lote or args.arquivos:
+        resultados = executar_lote(pdf_files, output_dir, acronyms, standardization_map, workers=args.workers,
+                                   stream=args.stream, cache_path=args.cache_normalizacao)
+        if any(not r["ok"] for r in resultados):
+            sys.exit(1)
+        return
+
+    input_pdf_path = _selecionar_interativo(pdf_files)
+    processar = processar_pdf_stream if args.stream else processar_pdf
+    processar(input_pdf_path, output_dir, acronyms, standardization_map)
+    cache.save()
+    _imprimir_cache(cache.hits, cache.misses)
 
     print("\nPipeline finalizado com sucesso!")
 
@@ -1,74 +1,269 @@
+import json
+import shutil
+import tempfile
+import numpy as np
 import torch
-from sentence_transformers import SentenceTransformer, util
-from typing import List, Dict, Any
+from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Any, Union
 
-def get_semantic_model(model_name: str = "sentence-transformers/all-MiniLM-L6-v2") -> SentenceTransformer:
+from embedding_cache import EmbeddingCache
+from embedding_index import EmbeddingIndex
+from encoder_backend import EncodingStats, encode_normalized, load_sentence_encoder
+from minhash import TextPrefilter
+
+def get_semantic_model(model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                       backend: str = "torch", threads: int = None,
+                       onnx_file_name: str = None) -> SentenceTransformer:
     """
     Carrega o modelo de embedding, tentando usar a GPU (cuda)
     se disponível.
+    Em hosts só com CPU, 'backend' escolhe uma inferência mais barata:
+    "torch-int8" (quantização dinâmica) ou "onnx" (ONNX Runtime); 'threads'
+    limita as threads intra-op. Ver encoder_backend.load_sentence_encoder.
     """
     print(f"   -> Carregando modelo de embedding: '{model_name}'...")
     print("      (Isso pode demorar um pouco na primeira vez)")
     
     # Tenta usar a GPU (cuda) se disponível, senão usa a CPU
-    device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    print(f"      (Usando dispositivo: {device})")
+    device = 'cuda' if backend == "torch" and torch.cuda.is_available() else 'cpu'
+    print(f"      (Usando dispositivo: {device}, backend: {backend})")
     
-    model = SentenceTransformer(model_name, device=device)
-    return model
+    # O nome (com o backend) fica em model.cache_name, a chave do EmbeddingCache
+    return load_sentence_encoder(model_name, backend=backend, threads=threads,
+                                 device=device, onnx_file_name=onnx_file_name)
+
+def _as_index(global_seen_embeddings) -> EmbeddingIndex:
+    """Aceita um EmbeddingIndex, uma lista de tensores (formato antigo) ou None."""
+    if isinstance(global_seen_embeddings, EmbeddingIndex):
+        return global_seen_embeddings
+    legacy_embeddings = global_seen_embeddings or []
+    index = EmbeddingIndex()
+    if len(legacy_embeddings):
+        index.add(np.stack([np.asarray(e.cpu() if hasattr(e, "cpu") else e) for e in legacy_embeddings]))
+    return index
+
+
+def _semantic_keep_mask(
+    blocks: List[Dict[str, Any]],
+    model: SentenceTransformer,
+    index: EmbeddingIndex,
+    threshold: float,
+    min_length: int,
+    top_k: int,
+    tile_size: int,
+    prefilter: TextPrefilter,
+    embedding_cache: EmbeddingCache = None,
+    show_progress_bar: bool = True,
+    max_tokens: int = 4096,
+    encode_stats: EncodingStats = None
+) -> np.ndarray:
+    """
+    Decide, na ordem, quais blocos ficam: blocos curtos sempre ficam; os demais
+    passam pelo pré-filtro e só os restantes são codificados e comparados com o
+    índice (que recebe os mantidos). Retorna a máscara de blocos mantidos.
+    """
+    keep = np.ones(len(blocks), dtype=bool)
+    candidates = []
+    for i, block in enumerate(blocks):
+        text = block.get("texto_normalizado", "")
+        if len(text) < min_length:
+            continue
+        # Pré-filtro: cópias exatas/quase exatas não precisam passar pelo modelo
+        if prefilter.is_new(text):
+            candidates.append(i)
+        else:
+            keep[i] = False
+    if not candidates:
+        return keep
+
+    texts_to_check = [blocks[i].get("texto_normalizado") for i in candidates]
+    def _encode(texts):
+        # Lotes por orçamento de tokens, com textos de tamanho parecido (pouco padding)
+        return encode_normalized(model, texts, max_tokens=max_tokens, stats=encode_stats,
+                                 show_progress_bar=show_progress_bar)
+
+    model_name = getattr(model, "cache_name", None)
+    if embedding_cache is not None and model_name:
+        new_embeddings = embedding_cache.encode(model_name, texts_to_check, _encode)
+    else:
+        new_embeddings = _encode(texts_to_check)
+
+    # Deduplicação gulosa, em fatias: cada bloco é comparado com o índice global
+    # (arquivos e lotes anteriores) e com os blocos já mantidos deste lote
+    keep[candidates] = index.add_if_new(new_embeddings, threshold, k=top_k, tile_size=tile_size)
+    return keep
+
 
 def deduplicate_semantically(
     blocks: List[Dict[str, Any]], 
     model: SentenceTransformer,
-    global_seen_embeddings: List[torch.Tensor], 
+    global_seen_embeddings: Union[EmbeddingIndex, List[torch.Tensor], None] = None, 
     threshold: float = 0.85, 
-    min_length: int = 50
-) -> (List[Dict[str, Any]], List[torch.Tensor]):
+    min_length: int = 50,
+    top_k: int = 1,
+    tile_size: int = 1024,
+    prefilter: TextPrefilter = None,
+    embedding_cache: EmbeddingCache = None,
+    max_tokens: int = 4096,
+    encode_stats: EncodingStats = None
+) -> (List[Dict[str, Any]], EmbeddingIndex):
     """
     Processa uma lista de blocos (de um arquivo) e remove duplicatas
-    semânticas comparando com um cache global de embeddings.
+    semânticas comparando com um índice global de embeddings.
+
+    'global_seen_embeddings' é um EmbeddingIndex (FAISS ou matriz NumPy) que
+    cresce de arquivo para arquivo: cada bloco novo consulta só os seus 'top_k'
+    vizinhos mais próximos, em vez de comparar com todos os embeddings já
+    vistos. Duplicatas dentro do próprio arquivo também são removidas (mantém
+    a primeira ocorrência), em fatias de 'tile_size' blocos para limitar a
+    memória. Uma lista de tensores (formato antigo) ou None também é aceita e
+    convertida num índice. Retorna (blocos limpos, índice atualizado).
+
+    Antes do modelo, um pré-filtro barato ('prefilter', minhash.TextPrefilter)
+    descarta as cópias exatas e as quase-cópias (MinHash LSH sobre shingles),
+    e só os blocos restantes são codificados. Passe o mesmo TextPrefilter para
+    todos os arquivos, como o índice; sem ele, um novo é criado a cada chamada.
+
+    Com 'embedding_cache' (embedding_cache.EmbeddingCache) e um modelo vindo de
+    get_semantic_model, textos já codificados em execuções anteriores são lidos
+    do disco em vez de passar pelo modelo.
+
+    Os textos vão ao modelo ordenados por tamanho, em lotes de até 'max_tokens'
+    tokens (com padding); 'encode_stats' (encoder_backend.EncodingStats)
+    acumula tokens/s para ajustar esse orçamento.
+
+    (Para arquivos grandes, deduplicate_jsonl_file faz o mesmo em lotes, sem
+    carregar o arquivo inteiro.)
     """
-    
-    clean_blocks = []
-    new_embeddings_to_add = [] 
+    global_seen_embeddings = _as_index(global_seen_embeddings)
+    if prefilter is None:
+        prefilter = TextPrefilter()
+    prefiltered_before = prefilter.exact_duplicates + prefilter.near_duplicates
 
-    blocks_to_keep = [b for b in blocks if len(b.get("texto_normalizado", "")) < min_length]
-    blocks_to_process = [b for b in blocks if len(b.get("texto_normalizado", "")) >= min_length]
-    
-    clean_blocks.extend(blocks_to_keep) 
-    
-    if not blocks_to_process:
-        return clean_blocks, global_seen_embeddings
+    keep = _semantic_keep_mask(
+        blocks, model, global_seen_embeddings, threshold, min_length,
+        top_k, tile_size, prefilter, embedding_cache,
+        max_tokens=max_tokens, encode_stats=encode_stats
+    )
 
-    texts_to_check = [b.get("texto_normalizado") for b in blocks_to_process]
-    new_embeddings = model.encode(texts_to_check, convert_to_tensor=True, show_progress_bar=True)
-    
-    if not global_seen_embeddings:
-        # Este é o primeiro arquivo, todos os blocos são únicos
-        print("   -> (Primeiro arquivo, todos os blocos são únicos por padrão)")
-        clean_blocks.extend(blocks_to_process)
-        global_seen_embeddings.extend(new_embeddings)
-    else:
-        # Compara os N novos embeddings com os M embeddings da memória
-        existing_embeddings_tensor = torch.stack(global_seen_embeddings)
-        
-        # Calcula a similaridade de cossenos
-        similarities = util.cos_sim(new_embeddings, existing_embeddings_tensor)
-        
-        # Verifica, para cada novo bloco, se ele é duplicado
-        for i in range(len(blocks_to_process)):
-            # Verifica se QUALQUER similaridade para este bloco [i] é > threshold
-            is_duplicate = torch.any(similarities[i] > threshold)
-            
-            if not is_duplicate:
-                # Bloco é único
-                clean_blocks.append(blocks_to_process[i])
-                # Adiciona à lista temporária para não comparar com ele mesmo
-                new_embeddings_to_add.append(new_embeddings[i])
-            # else: Bloco é um duplicado semântico e é descartado
-    
-    # Adiciona os novos embeddings únicos ao cache global
-    if new_embeddings_to_add:
-        global_seen_embeddings.extend(new_embeddings_to_add)
-        
-    return clean_blocks, global_seen_embeddings
\ No newline at end of file
+    prefiltered = prefilter.exact_duplicates + prefilter.near_duplicates - prefiltered_before
+    if prefiltered:
+        print(f"      (Pré-filtro: {prefiltered} blocos repetidos descartados antes do embedding)")
+
+    # Blocos curtos primeiro (como antes), depois os únicos; os duplicados são descartados
+    clean_blocks = [b for b in blocks if len(b.get("texto_normalizado", "")) < min_length]
+    clean_blocks.extend(
+        block for block, unique in zip(blocks, keep)
+        if unique and len(block.get("texto_normalizado", "")) >= min_length
+    )
+    return clean_blocks, global_seen_embeddings
+
+
+def _iter_jsonl_batches(path: str, batch_size: int):
+    """Lê o JSONL em lotes de 'batch_size' blocos (linhas corrompidas são puladas)."""
+    batch = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                batch.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Aviso: Linha corrompida pulada em {path}")
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def deduplicate_jsonl_file(
+    input_path: str,
+    output_path: str,
+    model: SentenceTransformer,
+    global_seen_embeddings: Union[EmbeddingIndex, None] = None,
+    threshold: float = 0.85,
+    min_length: int = 50,
+    batch_size: int = 256,
+    top_k: int = 1,
+    prefilter: TextPrefilter = None,
+    embedding_cache: EmbeddingCache = None,
+    max_tokens: int = 4096,
+    encode_stats: EncodingStats = None
+) -> (int, int, EmbeddingIndex):
+    """
+    Deduplicação semântica em fluxo de um arquivo JSONL: lê 'batch_size' blocos
+    por vez, codifica o lote, consulta o índice e grava os blocos mantidos.
+    A memória depende do tamanho do lote (e do índice), não do tamanho do
+    documento.
+    Mesmas regras e mesma saída de deduplicate_semantically: os blocos curtos
+    vão direto para 'output_path' e os demais mantidos passam por um arquivo
+    temporário, copiado ao final, então a ordem também é a mesma (curtos
+    primeiro). benchmarks/bench_dedup_paths.py confere as duas versões.
+    Retorna (blocos lidos, blocos gravados, índice atualizado).
+    """
+    global_seen_embeddings = _as_index(global_seen_embeddings)
+    if prefilter is None:
+        prefilter = TextPrefilter()
+
+    total_in = total_out = 0
+    with open(output_path, 'w', encoding='utf-8') as f_out, \
+         tempfile.TemporaryFile('w+', encoding='utf-8') as f_long:
+        for batch in _iter_jsonl_batches(input_path, batch_size):
+            keep = _semantic_keep_mask(
+                batch, model, global_seen_embeddings, threshold, min_length,
+                top_k, batch_size, prefilter, embedding_cache, show_progress_bar=False,
+                max_tokens=max_tokens, encode_stats=encode_stats
+            )
+            for block, unique in zip(batch, keep):
+                if not unique:
+                    continue
+                line = json.dumps(block, ensure_ascii=False) + "\n"
+                # Blocos curtos primeiro, como em deduplicate_semantically
+                if len(block.get("texto_normalizado", "")) < min_length:
+                    f_out.write(line)
+                else:
+                    f_long.write(line)
+            total_in += len(batch)
+            total_out += int(keep.sum())
+        f_long.seek(0)
+        shutil.copyfileobj(f_long, f_out)
+    return total_in, total_out, global_seen_embeddings
+
+def iter_deduplicate(elementos):
+    """
+    Versão em fluxo de deduplicate: consome os elementos da estrutura um a um
+    (ex: detect_structure.iter_structure) e gera-os sem os parágrafos repetidos
+    (mesmo texto, ignorando caixa e espaços). Mantém a primeira ocorrência.
+    """
+    seen_texts = set()
+
+    def _is_new(texto: str) -> bool:
+        chave = " ".join((texto or "").lower().split())
+        if not chave:
+            return True
+        if chave in seen_texts:
+            return False
+        seen_texts.add(chave)
+        return True
+
+    for elemento in elementos:
+        if elemento.get("tipo") == "artigo":
+            artigo = dict(elemento)
+            artigo["paragrafos"] = [p for p in elemento.get("paragrafos", []) if _is_new(p.get("texto"))]
+            yield artigo
+        elif _is_new(elemento.get("texto")):
+            yield elemento
+
+
+def deduplicate(structured_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Remove parágrafos repetidos (mesmo texto, ignorando caixa e espaços)
+    da estrutura gerada por detect_structure. Mantém a primeira ocorrência.
+    (Versão exata e barata, usada pelo main.py; a semântica fica em
+    deduplicate_semantically.)
+    """
+    deduplicated = dict(structured_data)
+    deduplicated["estrutura"] = list(iter_deduplicate(structured_data.get("estrutura", [])))
+    return deduplicated
@@ -3,29 +3,22 @@ import json
 import pdfplumber
 from pathlib import Path
 
-def detect_structure(pdf_path: str, text_blocks: list[dict], metadata: dict = None) -> dict:
+from pdf_session import PdfDocumentSession
+from regras_classificacao import CLASSIFICADOR_ESTRUTURAL
+
+def iter_structure(text_blocks, classificador=None):
     """
-    Detecta a estrutura de um documento PDF e retorna um JSON padrão.
+    Versão em fluxo da detecção de estrutura: consome os blocos {"text", "page"}
+    um a um (lista ou gerador, ex: extract_raw.iter_raw_blocks) e gera cada
+    elemento de nível superior assim que ele termina. Um artigo só é emitido
+    quando o próximo elemento começa (ou no fim), então a memória fica limitada
+    ao artigo corrente.
     Parágrafos que não são artigos recebem título como null.
+    Cada linha é classificada com uma única regex combinada
+    (regras_classificacao.ClassificadorEstrutural); 'classificador' permite
+    usar um conjunto de regras diferente do padrão.
     """
-    metadata = metadata or {}
-    doc_id = metadata.get("doc_id", "")
-    nome_doc = metadata.get("nome_doc", Path(pdf_path).stem if isinstance(pdf_path, (str, Path)) else str(pdf_path))
-    versao = metadata.get("versao", "1.0")
-    data_publicacao = metadata.get("data_publicacao", "")
-    pagina_inicial = metadata.get("pagina_inicial", 1)
-    pagina_final = metadata.get("pagina_final", len(text_blocks))
-
-    structure = {
-        "doc_id": doc_id,
-        "nome_doc": nome_doc,
-        "versao": versao,
-        "data_publicacao": data_publicacao,
-        "pagina_inicial": pagina_inicial,
-        "pagina_final": pagina_final,
-        "estrutura": []
-    }
-
+    classificar = (classificador or CLASSIFICADOR_ESTRUTURAL).classificar
     current_article = None
 
     for block in text_blocks:
@@ -35,45 +28,79 @@ def detect_structure(pdf_path: str, text_blocks: list[dict], metadata: dict = No
         if not line:
             continue
 
+        _, categoria, rotulo, resto = classificar(line)
+
         # Detecta artigos
-        match_artigo = re.match(r"^(art\.?\s*\d+º?)(.*)", line, re.IGNORECASE)
-        if match_artigo:
-            artigo_titulo = match_artigo.group(1).capitalize()
-            artigo_texto = match_artigo.group(2).strip()
+        if categoria == "artigo":
+            artigo_titulo = rotulo.capitalize()
+            artigo_texto = resto.strip()
             new_article = {"tipo": "artigo", "titulo": artigo_titulo, "paragrafos": []}
             if artigo_texto:
                 new_article["paragrafos"].append({"numero": None, "texto": artigo_texto, "pagina": page_num})
-            structure["estrutura"].append(new_article)
+            if current_article:
+                yield current_article
             current_article = new_article
             continue
 
         # Detecta parágrafos numerados ou incisos
-        match_paragrafo = re.match(r"^(§\s*\d+º|parágrafo único|\b[ivxlcdm]+\s*[-–—])\s*(.*)", line, re.IGNORECASE)
-        if match_paragrafo:
-            paragraph_number = match_paragrafo.group(1).strip()
-            paragraph_text = match_paragrafo.group(2).strip()
+        if categoria == "paragrafo":
+            paragraph_number = rotulo.strip()
+            paragraph_text = resto.strip()
             if current_article:
                 current_article["paragrafos"].append({"numero": paragraph_number, "texto": paragraph_text, "pagina": page_num})
             else:
-                structure["estrutura"].append({
+                yield {
                     "tipo": "paragrafo",
                     "titulo": None,
                     "numero": paragraph_number,
                     "texto": paragraph_text,
                     "pagina": page_num
-                })
+                }
             continue
 
         # Qualquer outro texto que não seja artigo ou parágrafo numerado
         if current_article:
             current_article["paragrafos"].append({"numero": None, "texto": line, "pagina": page_num})
         else:
-            structure["estrutura"].append({
+            yield {
                 "tipo": "paragrafo",
                 "titulo": None,
                 "numero": None,
                 "texto": line,
                 "pagina": page_num
-            })
+            }
+
+    if current_article:
+        yield current_article
+
+def detect_structure(pdf_path, text_blocks: list[dict], metadata: dict = None) -> dict:
+    """
+    Detecta a estrutura de um documento PDF e retorna um JSON padrão.
+    Parágrafos que não são artigos recebem título como null.
+    'pdf_path' pode ser um caminho ou uma PdfDocumentSession.
+    'text_blocks' pode ser uma lista ou um gerador de blocos.
+    """
+    metadata = metadata or {}
+    if isinstance(pdf_path, PdfDocumentSession):
+        pdf_path = pdf_path.path
+    if not isinstance(text_blocks, list):
+        text_blocks = list(text_blocks)
+
+    doc_id = metadata.get("doc_id", "")
+    nome_doc = metadata.get("nome_doc", Path(pdf_path).stem if isinstance(pdf_path, (str, Path)) else str(pdf_path))
+    versao = metadata.get("versao", "1.0")
+    data_publicacao = metadata.get("data_publicacao", "")
+    pagina_inicial = metadata.get("pagina_inicial", 1)
+    pagina_final = metadata.get("pagina_final", len(text_blocks))
+
+    structure = {
+        "doc_id": doc_id,
+        "nome_doc": nome_doc,
+        "versao": versao,
+        "data_publicacao": data_publicacao,
+        "pagina_inicial": pagina_inicial,
+        "pagina_final": pagina_final,
+        "estrutura": list(iter_structure(text_blocks))
+    }
 
     return structure
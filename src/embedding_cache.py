@@ -0,0 +1,177 @@
+import hashlib
+import os
+import re
+import sqlite3
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+# Limite de parâmetros por consulta "IN (...)" do sqlite
+_SQLITE_BATCH = 500
+
+
+def text_key(text: str) -> bytes:
+    """
+    Chave de cache do texto: hash do texto com os espaços colapsados.
+    Caixa e acentos são mantidos (o BERTimbau, por exemplo, é 'cased').
+    """
+    return hashlib.blake2b(" ".join((text or "").split()).encode('utf-8'), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """
+    Cache em disco de embeddings, compartilhado pela deduplicação semântica
+    (deduplicate.py) e pelo vector store do RAG (rag_pipeline/vector_store.py).
+
+    Chave: (nome do modelo, hash do texto normalizado). Os vetores de cada
+    modelo ficam num arquivo float32 só de acréscimos, lido via np.memmap; um
+    índice sqlite guarda a linha de cada chave. Textos já vistos não passam
+    pelo modelo.
+
+    Uso:
+        cache = EmbeddingCache("data/cache_embeddings")
+        vetores = cache.encode("all-MiniLM-L6-v2", textos, lambda t: model.encode(t))
+        print(cache.stats())
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "indice.sqlite"), timeout=60)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS modelos (modelo TEXT PRIMARY KEY, arquivo TEXT NOT NULL, dim INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS embeddings (
+                modelo TEXT NOT NULL, chave BLOB NOT NULL, linha INTEGER NOT NULL,
+                PRIMARY KEY (modelo, chave)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._db.commit()
+        self._matrices = {}
+        self.hits = 0
+        self.misses = 0
+
+    # --- Arquivos de vetores ---
+    def _model_file(self, model_name: str, dim: int = None):
+        row = self._db.execute("SELECT arquivo, dim FROM modelos WHERE modelo = ?", (model_name,)).fetchone()
+        if row is not None:
+            return os.path.join(self.directory, row[0]), row[1]
+        if dim is None:
+            return None, None
+        safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+        file_name = f"{safe_name}-{hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:8]}.f32"
+        self._db.execute("INSERT INTO modelos (modelo, arquivo, dim) VALUES (?, ?, ?)", (model_name, file_name, dim))
+        return os.path.join(self.directory, file_name), dim
+
+    def _matrix(self, model_name: str, min_rows: int) -> np.ndarray:
+        """memmap (somente leitura) dos vetores do modelo, reaberto se o arquivo cresceu."""
+        matrix = self._matrices.get(model_name)
+        if matrix is None or len(matrix) < min_rows:
+            path, dim = self._model_file(model_name)
+            rows = os.path.getsize(path) // (4 * dim)
+            matrix = np.memmap(path, dtype=np.float32, mode='r', shape=(rows, dim))
+            self._matrices[model_name] = matrix
+        return matrix
+
+    # --- Consulta e inserção ---
+    def _lookup(self, model_name: str, keys: Sequence[bytes]) -> dict:
+        found = {}
+        for start in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[start:start + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self._db.execute(
+                f"SELECT chave, linha FROM embeddings WHERE modelo = ? AND chave IN ({placeholders})",
+                (model_name, *batch)
+            ).fetchall())
+        return found
+
+    def get(self, model_name: str, texts: Sequence[str]) -> tuple[list, List[int]]:
+        """
+        Retorna (vetores, posições ausentes): 'vetores' tem um np.ndarray por
+        texto encontrado e None nos ausentes.
+        """
+        keys = [text_key(text) for text in texts]
+        rows = self._lookup(model_name, list(set(keys)))
+        vectors = [None] * len(texts)
+        missing = []
+        if rows:
+            matrix = self._matrix(model_name, max(rows.values()) + 1)
+        for i, key in enumerate(keys):
+            if key in rows:
+                vectors[i] = np.array(matrix[rows[key]])
+            else:
+                missing.append(i)
+        return vectors, missing
+
+    def put(self, model_name: str, texts: Sequence[str], vectors):
+        """Grava os vetores (um por texto). Chaves já presentes são ignoradas."""
+        vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+        if len(texts) == 0:
+            return
+        unique = {}
+        for text, vector in zip(texts, vectors):
+            unique.setdefault(text_key(text), vector)
+
+        # A transação trava o índice: outro processo não acrescenta linhas ao
+        # mesmo arquivo enquanto calculamos as posições
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            path, dim = self._model_file(model_name, vectors.shape[1])
+            if dim != vectors.shape[1]:
+                raise ValueError(f"Modelo '{model_name}' já tem vetores de dimensão {dim}, recebeu {vectors.shape[1]}.")
+            already = self._lookup(model_name, list(unique))
+            new_items = [(key, vector) for key, vector in unique.items() if key not in already]
+            if new_items:
+                first_row = os.path.getsize(path) // (4 * dim) if os.path.exists(path) else 0
+                # Os vetores vão para o disco antes de o índice apontar para eles
+                with open(path, 'ab') as f:
+                    f.write(np.stack([vector for _, vector in new_items]).tobytes())
+                self._db.executemany(
+                    "INSERT INTO embeddings (modelo, chave, linha) VALUES (?, ?, ?)",
+                    [(model_name, key, first_row + i) for i, (key, _) in enumerate(new_items)]
+                )
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+
+    def encode(self, model_name: str, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embeddings de 'texts' (na mesma ordem). Só os textos ausentes do cache
+        (sem repetição) são passados a 'encode_fn'; o resultado é gravado.
+        """
+        texts = list(texts)
+        vectors, missing = self.get(model_name, texts)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            positions = {}
+            for i in missing:
+                positions.setdefault(text_key(texts[i]), []).append(i)
+            to_encode = [texts[group[0]] for group in positions.values()]
+            encoded = np.asarray(encode_fn(to_encode), dtype=np.float32)
+            self.put(model_name, to_encode, encoded)
+            for group, vector in zip(positions.values(), encoded):
+                for i in group:
+                    vectors[i] = vector
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(vectors)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self._matrices.clear()
+        self._db.close()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,157 @@
+import time
+from typing import List
+
+import numpy as np
+import torch
+from tqdm.auto import tqdm
+from sentence_transformers import SentenceTransformer
+
+# Backends de inferência para os modelos de embedding (sentence-transformers):
+#   - "torch":      PyTorch fp32 (o comportamento original);
+#   - "torch-int8": PyTorch com quantização dinâmica int8 das camadas Linear
+#                   (torch.quantization.quantize_dynamic), só CPU;
+#   - "onnx":       ONNX Runtime (exporta o modelo na primeira vez, via optimum).
+#                   Com 'onnx_file_name' carrega um export já pronto, por
+#                   exemplo o quantizado "onnx/model_qint8_avx512_vnni.onnx".
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def load_sentence_encoder(model_name: str, backend: str = "torch", threads: int = None,
+                          device: str = None, onnx_file_name: str = None) -> SentenceTransformer:
+    """
+    Carrega um SentenceTransformer com o backend escolhido.
+    'threads' limita as threads intra-op (torch.set_num_threads / sessão do
+    ONNX Runtime). 'device' só vale para o backend "torch" (padrão: cuda se
+    disponível); os backends quantizados/ONNX rodam na CPU.
+
+    O modelo recebe o atributo 'cache_name' (nome do modelo + backend), usado
+    como chave no EmbeddingCache: vetores de backends diferentes não se misturam.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de embedding desconhecido: '{backend}'. Opções: {', '.join(BACKENDS)}.")
+    if threads:
+        torch.set_num_threads(threads)
+
+    if backend == "onnx":
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        if threads:
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            model_kwargs["session_options"] = session_options
+        if onnx_file_name:
+            model_kwargs["file_name"] = onnx_file_name
+        model = SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+    elif backend == "torch-int8":
+        model = SentenceTransformer(model_name, device="cpu")
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        if device is None:
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        model = SentenceTransformer(model_name, device=device)
+
+    suffix = "" if backend == "torch" else f"@{backend}" + (f":{onnx_file_name}" if onnx_file_name else "")
+    model.cache_name = model_name + suffix
+    return model
+
+
+class EncodingStats:
+    """
+    Acumula textos, tokens e tempo das chamadas ao modelo (para ajustar o lote).
+    'estimated' indica que algum lote foi medido sem o tokenizer do modelo
+    (contagem de palavras, ver token_lengths): tokens e padding são aproximados.
+    """
+
+    def __init__(self):
+        self.texts = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.batches = 0
+        self.seconds = 0.0
+        self.estimated = False
+
+    def add(self, texts: int, tokens: int, padded_tokens: int, seconds: float):
+        self.texts += texts
+        self.tokens += tokens
+        self.padded_tokens += padded_tokens
+        self.batches += 1
+        self.seconds += seconds
+
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+    def report(self) -> str:
+        padding = 1 - self.tokens / self.padded_tokens if self.padded_tokens else 0.0
+        report = (f"{self.texts} textos em {self.batches} lotes, {self.tokens} tokens em {self.seconds:.1f}s "
+                  f"({self.tokens_per_second():.0f} tokens/s, {padding:.0%} de padding)")
+        if self.estimated:
+            report += " [tokens estimados por contagem de palavras: modelo sem tokenizer]"
+        return report
+
+
+def token_lengths(model: SentenceTransformer, texts: List[str]) -> List[int]:
+    """
+    Número de tokens de cada texto (truncado em max_seq_length, como no encode).
+    Sem o atributo 'tokenizer' no modelo, estima pelo número de palavras + 2;
+    serve para ordenar os lotes, mas não para medir padding.
+    """
+    max_length = getattr(model, "max_seq_length", None) or 512
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return [min(max_length, len(text.split()) + 2) for text in texts]
+    ids = tokenizer(list(texts), add_special_tokens=True, truncation=True, max_length=max_length)["input_ids"]
+    return [len(x) for x in ids]
+
+
+def token_budget_batches(lengths: List[int], max_tokens: int = 4096, max_batch_size: int = 64) -> List[List[int]]:
+    """
+    Agrupa os índices dos textos, do mais longo ao mais curto, em lotes cujo
+    custo com padding (tamanho do lote x maior texto do lote) não passa de
+    'max_tokens'. Textos de tamanhos parecidos ficam juntos: pouco padding.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    batches = []
+    current = []
+    width = 0
+    for i in order:
+        if current and ((len(current) + 1) * width > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        if not current:
+            width = lengths[i]
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def encode_normalized(model: SentenceTransformer, texts: List[str], max_tokens: int = 4096,
+                      max_batch_size: int = 64, stats: EncodingStats = None,
+                      show_progress_bar: bool = False) -> np.ndarray:
+    """
+    Embeddings normalizados (float32 NumPy), como usados na deduplicação e no RAG.
+    Os textos são ordenados por número de tokens e enviados em lotes limitados
+    por 'max_tokens' (ver token_budget_batches); o resultado volta na ordem
+    original. Com 'stats' (EncodingStats), acumula tokens e tempo de cada lote.
+    """
+    texts = list(texts)
+    if not texts:
+        dim = model.get_sentence_embedding_dimension() or 0
+        return np.empty((0, dim), dtype=np.float32)
+
+    lengths = token_lengths(model, texts)
+    if stats is not None and getattr(model, "tokenizer", None) is None:
+        stats.estimated = True
+    batches = token_budget_batches(lengths, max_tokens=max_tokens, max_batch_size=max_batch_size)
+    result = None
+    for batch in tqdm(batches, desc="Embeddings", unit="lote", disable=not show_progress_bar):
+        inicio = time.perf_counter()
+        vectors = model.encode([texts[i] for i in batch], batch_size=len(batch), convert_to_numpy=True,
+                               normalize_embeddings=True, show_progress_bar=False)
+        if stats is not None:
+            stats.add(len(batch), sum(lengths[i] for i in batch), len(batch) * lengths[batch[0]],
+                      time.perf_counter() - inicio)
+        if result is None:
+            result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        result[batch] = vectors
+    return result
@@ -4,13 +4,56 @@ import re
 from datetime import datetime
 from pypdf import PdfReader
 
-def enrich_metadata(structured_data: dict, pdf_path: str = None, custom_metadata: dict = None) -> dict:
+try:
+    import fitz
+except ImportError:  # PyMuPDF é opcional aqui: sem ele a sonda usa o pypdf
+    fitz = None
+
+from pdf_session import PdfDocumentSession
+
+# Chaves do /Info usadas pelo enrich_metadata, nos dois formatos de nome
+_PROBE_KEYS = {"Title": "title", "Subject": "subject", "CreationDate": "creationDate", "ModDate": "modDate"}
+
+def _info_value(pdf_info, key: str):
+    """
+    Lê uma chave do dicionário /Info aceitando os dois formatos:
+    pypdf usa '/Title', o pdfplumber (PdfDocumentSession) usa 'Title'.
+    """
+    if f"/{key}" in pdf_info:
+        return pdf_info[f"/{key}"]
+    return pdf_info.get(key)
+
+def probe_pdf_metadata(pdf_path: str) -> tuple[dict, int]:
+    """
+    Sonda leve de metadados: lê só o trailer, o dicionário /Info e o /Count da
+    raiz da árvore de páginas, sem percorrer as páginas (len(reader.pages) do
+    pypdf monta a lista inteira). Usa o PyMuPDF se estiver instalado, senão o
+    pypdf. Retorna ({"Title", "Subject", "CreationDate", "ModDate"}, nº de páginas).
+    """
+    if fitz is not None:
+        with fitz.open(pdf_path) as doc:
+            meta = doc.metadata or {}
+            info = {key: meta.get(fitz_key) for key, fitz_key in _PROBE_KEYS.items() if meta.get(fitz_key)}
+            return info, doc.page_count
+
+    reader = PdfReader(pdf_path)
+    meta = reader.metadata or {}
+    info = {key: meta[f"/{key}"] for key in _PROBE_KEYS if meta.get(f"/{key}")}
+    try:
+        page_count = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except (KeyError, TypeError, ValueError):
+        # /Count ausente ou inválido (PDF malformado): conta percorrendo a árvore
+        page_count = len(reader.pages)
+    return info, page_count
+
+def enrich_metadata(structured_data: dict, pdf_path=None, custom_metadata: dict = None) -> dict:
     """
     Enriquece a estrutura do documento com metadados, extraindo-os do PDF e combinando com metadados personalizados.
 
     Args:
         structured_data (dict): A estrutura do documento processada.
-        pdf_path (str, optional): O caminho para o arquivo PDF original, usado para inferir nome do documento e extrair metadados.
+        pdf_path (str | PdfDocumentSession, optional): O caminho para o arquivo PDF original (ou a sessão já aberta),
+                                                      usado para inferir nome do documento e extrair metadados.
         custom_metadata (dict, optional): Um dicionário com metadados personalizados para adicionar ou sobrescrever.
                                          Pode incluir: doc_id, nome_doc, versao, data_publicacao,
                                          pagina_inicial, pagina_final.
@@ -29,29 +72,35 @@ def enrich_metadata(structured_data: dict, pdf_path: str = None, custom_metadata
         "pagina_final": None,
     }
 
+    session = pdf_path if isinstance(pdf_path, PdfDocumentSession) else None
+    if session is not None:
+        pdf_path = session.path
+
     if pdf_path and os.path.exists(pdf_path):
         try:
-            reader = PdfReader(pdf_path)
-            pdf_info = reader.metadata
-            
+            if session is not None:
+                # Reaproveita o arquivo já aberto pela sessão (sem reabrir com pypdf)
+                pdf_info = session.metadata
+                page_count = session.page_count
+            else:
+                pdf_info, page_count = probe_pdf_metadata(pdf_path)
+
             if pdf_info:
-                if "/Title" in pdf_info: metadata["nome_doc"] = pdf_info["/Title"]
-                elif "/Subject" in pdf_info: metadata["nome_doc"] = pdf_info["/Subject"]
+                title = _info_value(pdf_info, "Title")
+                subject = _info_value(pdf_info, "Subject")
+                if title: metadata["nome_doc"] = title
+                elif subject: metadata["nome_doc"] = subject
                 else: metadata["nome_doc"] = os.path.basename(pdf_path)
 
-                if "/CreationDate" in pdf_info:
-                    date_str = pdf_info["/CreationDate"]
-                    match = re.search(r"\d{4}(\d{2})(\d{2})", date_str)
-                    if match: metadata["data_publicacao"] = f"{match.group(0)[:4]}-{match.group(1)}-{match.group(2)}"
-                elif "/ModDate" in pdf_info:
-                    date_str = pdf_info["/ModDate"]
-                    match = re.search(r"\d{4}(\d{2})(\d{2})", date_str)
+                date_str = _info_value(pdf_info, "CreationDate") or _info_value(pdf_info, "ModDate")
+                if date_str:
+                    match = re.search(r"\d{4}(\d{2})(\d{2})", str(date_str))
                     if match: metadata["data_publicacao"] = f"{match.group(0)[:4]}-{match.group(1)}-{match.group(2)}"
 
-            metadata["pagina_final"] = len(reader.pages)
+            metadata["pagina_final"] = page_count
 
         except Exception as e:
-            print(f"Aviso: Não foi possível extrair metadados do PDF {pdf_path} usando pypdf: {e}")
+            print(f"Aviso: Não foi possível extrair metadados do PDF {pdf_path}: {e}")
             metadata["nome_doc"] = os.path.basename(pdf_path)
     else:
         metadata["nome_doc"] = os.path.basename(pdf_path) if pdf_path else "Documento Desconhecido"
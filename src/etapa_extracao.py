@@ -1,7 +1,14 @@
 import fitz
+import hashlib
 import json
+import math
+import os
+import tempfile
+import time
 import warnings
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from unstructured.partition.pdf import partition_pdf
 from unstructured.cleaners.core import clean_extra_whitespace
@@ -11,15 +18,273 @@ from regras_classificacao import (
     atualizar_contexto_estrutural,
     classificar_elemento_unstructured
 )
+from jsonl_io import JsonlWriter
+from table_detection import fitz_page_table_signals, is_table_page
 
 # Ignora warnings de performance
 warnings.filterwarnings("ignore", category=UserWarning, module='unstructured')
 
-def processar_documento(pdf_path: str, jsonl_output_path: str):
+# Versão da extração: mude quando a saída mudar (regras, estratégia, schema),
+# para que o manifesto force o reprocessamento de todos os PDFs
+VERSAO_PIPELINE = "2"
+
+ESTRATEGIAS = ("hi_res", "adaptativa")
+
+def calcular_hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """SHA-256 (hex) do conteúdo do arquivo, lido em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def carregar_manifesto(manifesto_path: str) -> dict:
+    """
+    Manifesto da extração incremental:
+    {caminho do PDF: {"hash", "versao_pipeline", "estrategia", "compacto", "saida", "processado_em"}}.
+    """
+    if not manifesto_path or not os.path.exists(manifesto_path):
+        return {}
+    try:
+        with open(manifesto_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("arquivos", {})
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Aviso: Manifesto ilegível em {manifesto_path}, todos os PDFs serão processados: {e}")
+        return {}
+
+def registrar_no_manifesto(manifesto_path: str, pdf_path: str, hash_arquivo: str, jsonl_output_path: str,
+                           estrategia: str = "hi_res", compacto: bool = False):
+    """
+    Atualiza a entrada do PDF no manifesto (escrita atômica). 'estrategia' é a
+    pedida pelo chamador e 'compacto' o layout do JSONL gravado.
+    """
+    arquivos = carregar_manifesto(manifesto_path)
+    arquivos[str(Path(pdf_path).resolve())] = {
+        "hash": hash_arquivo,
+        "versao_pipeline": VERSAO_PIPELINE,
+        "estrategia": estrategia,
+        "compacto": compacto,
+        "saida": str(Path(jsonl_output_path).resolve()),
+        "processado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    temp_path = manifesto_path + ".temp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({"arquivos": arquivos}, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifesto_path)
+
+def documento_inalterado(manifesto: dict, pdf_path: str, hash_arquivo: str, jsonl_output_path: str,
+                         estrategia: str = "hi_res", compacto: bool = False) -> bool:
+    """
+    True se o PDF já foi extraído com o mesmo conteúdo, versão, estratégia,
+    layout (compacto ou não) e saída (e a saída existe). Entradas sem
+    "compacto" são de antes do layout compacto, ou seja, do formato normal.
+    """
+    entrada = manifesto.get(str(Path(pdf_path).resolve()))
+    return (
+        entrada is not None
+        and entrada.get("hash") == hash_arquivo
+        and entrada.get("versao_pipeline") == VERSAO_PIPELINE
+        and entrada.get("estrategia") == estrategia
+        and entrada.get("compacto", False) == compacto
+        and entrada.get("saida") == str(Path(jsonl_output_path).resolve())
+        and os.path.exists(jsonl_output_path)
+    )
+
+# --- Estratégia adaptativa: "fast" nas páginas de texto simples, hi_res no resto ---
+def rotear_paginas(doc_fitz, min_caracteres: int = 50, min_area_imagens: float = 0.1) -> dict:
+    """
+    Decide a estratégia do partition_pdf para cada página (número começando em 1):
+      - "hi_res" se a página não tem camada de texto (menos de 'min_caracteres',
+        precisa de OCR), se imagens cobrem mais de 'min_area_imagens' da página
+        (logotipos pequenos de cabeçalho não contam) ou se a pré-varredura de
+        tabelas (table_detection) acha uma tabela;
+      - "fast" para as demais (texto nativo, sem tabelas).
+    """
+    rotas = {}
+    for page in doc_fitz:
+        area_pagina = page.rect.width * page.rect.height or 1.0
+        # get_images só lista as referências (barato); as posições só se houver imagens
+        area_imagens = sum(abs(rect) for img in page.get_images() for rect in page.get_image_rects(img[0]))
+        if len(page.get_text("text").strip()) < min_caracteres:
+            rota = "hi_res"
+        elif area_imagens / area_pagina > min_area_imagens:
+            rota = "hi_res"
+        elif is_table_page(fitz_page_table_signals(page)):
+            rota = "hi_res"
+        else:
+            rota = "fast"
+        rotas[page.number + 1] = rota
+    return rotas
+
+def _salvar_paginas(doc_fitz, paginas: list, destino: str):
+    """Grava um PDF só com as 'paginas' (números começando em 1), em ordem."""
+    novo = fitz.open()
+    inicio = anterior = None
+    for pagina in list(paginas) + [None]:
+        # Copia intervalos contíguos de uma vez
+        if pagina is not None and anterior is not None and pagina == anterior + 1:
+            anterior = pagina
+            continue
+        if inicio is not None:
+            novo.insert_pdf(doc_fitz, from_page=inicio - 1, to_page=anterior - 1)
+        inicio = anterior = pagina
+    novo.save(destino)
+    novo.close()
+
+def particionar_paginas(pdf_path: str, paginas: list, strategy: str, doc_fitz=None, **kwargs) -> list:
+    """
+    Roda o partition_pdf só nas 'paginas' (números começando em 1), num PDF
+    temporário recortado com o fitz, e devolve os elementos com o número de
+    página, o filename, o file_directory e o last_modified do documento
+    original.
+
+    Os ids dos elementos e os links parent_id são gerados pelo partition_pdf
+    no PDF recortado, então valem só dentro do lote: não são os mesmos de uma
+    execução no documento inteiro (o JSONL não usa esses campos; os blocos são
+    numerados depois, em processar_documento).
+    """
+    paginas = sorted(paginas)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorte = os.path.join(tmp, "paginas.pdf")
+        if doc_fitz is None:
+            with fitz.open(pdf_path) as doc:
+                _salvar_paginas(doc, paginas, recorte)
+        else:
+            _salvar_paginas(doc_fitz, paginas, recorte)
+        # filename, file_directory e last_modified do PDF original, não do recorte
+        modificado = datetime.fromtimestamp(os.path.getmtime(pdf_path)).strftime("%Y-%m-%dT%H:%M:%S")
+        elementos = partition_pdf(recorte, strategy=strategy, metadata_filename=pdf_path,
+                                  metadata_last_modified=modificado, **kwargs)
+    for el in elementos:
+        if el.metadata.page_number:
+            el.metadata.page_number = paginas[el.metadata.page_number - 1]
+    return elementos
+
+# Parâmetros do partition_pdf por estratégia
+_KWARGS_ESTRATEGIA = {
+    "fast": {},
+    "hi_res": {"infer_table_structure": True, "extract_images_in_pdf": False},
+}
+
+def planejar_lotes(rotas: dict, paginas_por_lote: int = None) -> list:
+    """
+    Divide as páginas roteadas ({página: estratégia}) em lotes (estratégia,
+    [páginas]). Sem 'paginas_por_lote', um lote por estratégia (o mínimo de
+    chamadas ao partition_pdf); com ele, intervalos contíguos de páginas da
+    mesma estratégia com no máximo 'paginas_por_lote' páginas cada, em ordem.
+    """
+    if not paginas_por_lote:
+        lotes = {}
+        for pagina, estrategia in sorted(rotas.items()):
+            lotes.setdefault(estrategia, []).append(pagina)
+        return list(lotes.items())
+
+    lotes = []
+    for pagina, estrategia in sorted(rotas.items()):
+        if (lotes and lotes[-1][0] == estrategia and lotes[-1][1][-1] == pagina - 1
+                and len(lotes[-1][1]) < paginas_por_lote):
+            lotes[-1][1].append(pagina)
+        else:
+            lotes.append((estrategia, [pagina]))
+    return lotes
+
+def _particionar_lote(pdf_path: str, estrategia: str, paginas: list, total_paginas: int) -> tuple:
+    """Particiona um lote (no processo atual ou num worker). Retorna (elementos, segundos)."""
+    inicio = time.perf_counter()
+    kwargs = _KWARGS_ESTRATEGIA[estrategia]
+    if len(paginas) == total_paginas:
+        # Documento inteiro numa estratégia só: sem recorte
+        elementos = partition_pdf(pdf_path, strategy=estrategia, **kwargs)
+    else:
+        elementos = particionar_paginas(pdf_path, paginas, estrategia, **kwargs)
+    return elementos, time.perf_counter() - inicio
+
+def particionar_documento(pdf_path: str, rotas: dict, workers: int = None, paginas_por_lote: int = None) -> list:
+    """
+    Particiona o documento segundo as rotas por página ({página: "fast" ou
+    "hi_res"}) e junta os elementos em ordem de página.
+
+    Com 'workers' > 1, os lotes de páginas (recortados com o fitz) rodam num
+    pool de processos; os elementos são juntados pela ordem das páginas, então
+    a saída é a mesma da execução sequencial. Os ids dos elementos e os
+    parent_id vêm de cada lote (ver particionar_paginas) e não se ligam entre
+    lotes.
+
+    Mostra o tempo de cada estratégia e, quando há páginas "fast" e "hi_res",
+    a economia em relação a rodar o hi_res no documento inteiro (estimada pelo
+    tempo por página do hi_res nesta mesma execução).
+    """
+    total_paginas = len(rotas)
+    paralelo = bool(workers and workers > 1)
+    if paralelo and not paginas_por_lote:
+        paginas_por_lote = max(1, math.ceil(total_paginas / (workers * 2)))
+    lotes = planejar_lotes(rotas, paginas_por_lote)
+
+    inicio = time.perf_counter()
+    if paralelo and len(lotes) > 1:
+        print(f"Particionando {len(lotes)} lotes de até {paginas_por_lote} páginas com {workers} processos...")
+        with ProcessPoolExecutor(max_workers=min(workers, len(lotes))) as executor:
+            resultados = list(executor.map(
+                _particionar_lote,
+                [pdf_path] * len(lotes), [e for e, _ in lotes], [p for _, p in lotes], [total_paginas] * len(lotes)
+            ))
+    else:
+        resultados = [_particionar_lote(pdf_path, estrategia, paginas, total_paginas) for estrategia, paginas in lotes]
+    tempo_total = time.perf_counter() - inicio
+
+    elementos, tempos, paginas_por_estrategia = [], {}, {}
+    for (estrategia, paginas), (elementos_lote, segundos) in zip(lotes, resultados):
+        # Elementos sem page_number herdam a última página conhecida do lote
+        # (no começo do lote, a primeira página dele) e ficam onde estavam
+        pagina_atual = paginas[0]
+        for el in elementos_lote:
+            pagina_atual = el.metadata.page_number or pagina_atual
+            elementos.append((pagina_atual, el))
+        tempos[estrategia] = tempos.get(estrategia, 0.0) + segundos
+        paginas_por_estrategia[estrategia] = paginas_por_estrategia.get(estrategia, 0) + len(paginas)
+
+    linha = " + ".join(f"{estrategia} {segundos:.1f}s" for estrategia, segundos in tempos.items())
+    if paralelo:
+        linha += f" (em paralelo: {tempo_total:.1f}s de relógio)"
+    if "fast" in tempos and "hi_res" in tempos:
+        estimado = tempos["hi_res"] / paginas_por_estrategia["hi_res"] * total_paginas
+        linha += (f" | economia estimada de {estimado - sum(tempos.values()):.1f}s em relação ao "
+                  f"hi_res em todas as páginas ({estimado:.1f}s)")
+    print(f"Tempo: {linha}.")
+
+    # Ordenação estável: cada página vem de um único lote, na ordem do partition_pdf
+    elementos.sort(key=lambda item: item[0])
+    return [el for _, el in elementos]
+
+def processar_documento(pdf_path: str, jsonl_output_path: str, manifesto_path: str = None,
+                        forcar: bool = False, estrategia: str = "hi_res", workers: int = None,
+                        paginas_por_lote: int = None, compacto: bool = False) -> bool:
     """
     Função principal que executa a Etapa 1 (Extração) e Etapa 3 (Estrutura).
     Lê um PDF, o processa com o unstructured, aplica as regras de classificação
     e salva o resultado em um arquivo JSONL.
+
+    O SHA-256 do PDF vai em metadados_doc["hash_arquivo"]. Com 'manifesto_path',
+    PDFs inalterados (mesmo hash, mesma VERSAO_PIPELINE e JSONL de saída
+    existente) são pulados, e os processados são registrados no manifesto.
+    'forcar' reprocessa mesmo assim. Retorna True se o PDF foi processado.
+
+    'estrategia': "hi_res" (padrão) roda o hi_res em todas as páginas, como
+    sempre. "adaptativa" é opcional: usa o "fast" nas páginas de texto nativo
+    sem tabelas e o hi_res só nas páginas com tabelas, imagens ou sem camada
+    de texto (ver rotear_paginas). Os elementos das páginas "fast" não são os
+    mesmos do hi_res (tipos, quebras e coordenadas mudam), então o JSONL muda.
+
+    Com 'workers' > 1, o documento é dividido em lotes de 'paginas_por_lote'
+    páginas (recortados com o fitz) particionados em paralelo e juntados em
+    ordem de página (ver particionar_documento). A numeração dos blocos e o
+    contexto estrutural são calculados depois, numa passada sequencial, então
+    o JSONL é o mesmo da execução sequencial (os ids e parent_id do
+    unstructured, que mudam por lote, não vão para o JSONL).
+
+    'compacto': grava nome_doc, metadados_doc e estrutura_global uma única vez,
+    num registro de cabeçalho, em vez de repeti-los em toda linha (ver
+    jsonl_io.JsonlWriter; o rag_pipeline.loader lê os dois formatos).
     """
     pdf_nome = Path(pdf_path).name
     doc_id_base = Path(pdf_path).stem
@@ -27,37 +292,68 @@ def processar_documento(pdf_path: str, jsonl_output_path: str):
     print(f"\n--- Processando: {pdf_nome} ---")
     
     try:
-        # Pega o total de páginas (com fitz, rápido)
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estratégia desconhecida: '{estrategia}'. Opções: {', '.join(ESTRATEGIAS)}.")
+        hash_arquivo = calcular_hash_arquivo(pdf_path)
+        if manifesto_path and not forcar:
+            if documento_inalterado(carregar_manifesto(manifesto_path), pdf_path, hash_arquivo, jsonl_output_path,
+                                    estrategia, compacto):
+                print(f"PDF inalterado desde a última extração (sha256 {hash_arquivo[:12]}...). Pulando.")
+                return False
+
+        # Pega o total de páginas (com fitz, rápido). O manifesto registra a
+        # estratégia pedida, mesmo se for preciso cair para o hi_res aqui
+        estrategia_pedida = estrategia
         total_paginas_doc = 0
         try:
             with fitz.open(pdf_path) as doc_fitz:
                 total_paginas_doc = doc_fitz.page_count
         except Exception as e:
             print(f"Aviso: Não foi possível contar as páginas com fitz: {e}")
+            if estrategia == "adaptativa":
+                # Sem o fitz não há roteamento por página
+                print("Aviso: Usando a estratégia hi_res em todas as páginas.")
+                estrategia = "hi_res"
 
         #O CORAÇÃO DA EXTRAÇÃO (ETAPA 1)
-        print("Iniciando particionamento com 'unstructured' (estratégia hi_res)...")
-        elementos = partition_pdf(
-            pdf_path,
-            strategy="hi_res",
-            infer_table_structure=True,
-            extract_images_in_pdf=False
-        )
+        if estrategia == "adaptativa":
+            print("Iniciando particionamento com 'unstructured' (estratégia adaptativa)...")
+            with fitz.open(pdf_path) as doc_fitz:
+                rotas = rotear_paginas(doc_fitz)
+            n_hi_res = sum(1 for rota in rotas.values() if rota == "hi_res")
+            print(f"Roteamento: {len(rotas) - n_hi_res} páginas 'fast', {n_hi_res} páginas 'hi_res'.")
+            elementos = particionar_documento(pdf_path, rotas, workers=workers, paginas_por_lote=paginas_por_lote)
+        elif workers and workers > 1 and total_paginas_doc:
+            print("Iniciando particionamento com 'unstructured' (estratégia hi_res, em lotes de páginas)...")
+            rotas = {pagina: "hi_res" for pagina in range(1, total_paginas_doc + 1)}
+            elementos = particionar_documento(pdf_path, rotas, workers=workers, paginas_por_lote=paginas_por_lote)
+        else:
+            print("Iniciando particionamento com 'unstructured' (estratégia hi_res)...")
+            elementos = partition_pdf(
+                pdf_path,
+                strategy="hi_res",
+                infer_table_structure=True,
+                extract_images_in_pdf=False
+            )
         print("Particionamento concluído.")
 
         #INICIALIZA O ESTADO (ETAPA 3)
         metadados_doc = {
             "total_paginas": total_paginas_doc,
             "instituicao": None, "campus": None, "curso": None,
-            "ano": None, "hash_arquivo": None
+            "ano": None, "hash_arquivo": hash_arquivo
         }
         contexto_atual = {
             "capitulo": None, "secao": None, "subsecao": None, "artigo": None
         }
         
         #LOOP DE ESTRUTURAÇÃO E ESCRITA
-        with open(jsonl_output_path, 'w', encoding='utf-8') as outfile:
+        # Escrita em lotes (orjson, se instalado); no modo compacto os metadados
+        # do documento vão uma vez só, num registro de cabeçalho
+        with JsonlWriter(jsonl_output_path, compacto=compacto) as outfile:
             
+            # Passada sequencial sobre os elementos já em ordem de página: a
+            # numeração e o contexto não dependem de como o PDF foi particionado
             bloco_counter = 0
             for el in elementos:
                 bloco_counter += 1
@@ -99,10 +395,16 @@ def processar_documento(pdf_path: str, jsonl_output_path: str):
                     json_linha['tabela_dados'] = el.metadata.text_as_html
                     json_linha['texto_bruto'] = f"[PLACEHOLDER_TABELA: {texto_limpo[:50]}...]"
 
-                outfile.write(json.dumps(json_linha, ensure_ascii=False) + "\n")
+                outfile.write(json_linha)
 
         print(f"Processamento concluído. JSONL salvo em: {jsonl_output_path}")
 
+        if manifesto_path:
+            registrar_no_manifesto(manifesto_path, pdf_path, hash_arquivo, jsonl_output_path,
+                                   estrategia_pedida, compacto)
+        return True
+
     except Exception as e:
         print(f"ERRO FATAL ao processar {pdf_nome}: {e}")
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+        return False
\ No newline at end of file
@@ -1,31 +1,46 @@
 import re
+import math
 import pdfplumber
+from bisect import bisect_left, insort
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-def _reconstruct_lines_from_words(page, x_tol=3, y_tol=3):
-    """
-    Fallback: reconstrói linhas agrupando words por proximidade vertical (y0).
-    Retorna lista de linhas já ordenadas left-to-right, top-to-bottom.
+from pdf_session import PdfDocumentSession, open_session
+
+def _group_words_into_lines(words, y_tol=3):
     """
-    words = page.extract_words()
-    if not words:
-        return []
+    Agrupa words em linhas por proximidade vertical (top).
+    Cada word entra na linha mais antiga cuja referência (top da 1ª word da linha)
+    esteja a até y_tol de distância; se nenhuma estiver, abre uma nova linha.
 
-    # Agrupa por "linha" usando aproximação de y0
-    lines_map = []  # lista de (y_mid, [words])
+    As referências ficam numa lista ordenada e a busca usa bisect, então o custo é
+    O(words · log linhas) em vez de comparar cada word com todas as linhas.
+    Como uma nova linha só é aberta a mais de y_tol de todas as outras, a janela
+    [y - y_tol, y + y_tol] contém no máximo duas referências.
+    """
+    lines_map = []    # lista de (y_ref, [words]) na ordem de criação
+    sorted_refs = []  # lista ordenada de (y_ref, índice em lines_map)
     for w in words:
         # cada word tem 'top' e 'bottom' (ou 'doctop'), usar 'top' se disponível
         y = float(w.get("top") or w.get("doctop") or 0)
         x = float(w.get("x0") or 0)
         text = w.get("text", "")
 
-        placed = False
-        for idx, (y_ref, items) in enumerate(lines_map):
-            if abs(y_ref - y) <= y_tol:
-                items.append((x, text))
-                placed = True
-                break
-        if not placed:
+        # Procura a linha mais antiga dentro da tolerância
+        pos = bisect_left(sorted_refs, (y - y_tol, -1))
+        while pos > 0 and abs(sorted_refs[pos - 1][0] - y) <= y_tol:
+            pos -= 1
+        target = None
+        while pos < len(sorted_refs) and sorted_refs[pos][0] - y <= y_tol:
+            y_ref, idx = sorted_refs[pos]
+            if abs(y_ref - y) <= y_tol and (target is None or idx < target):
+                target = idx
+            pos += 1
+
+        if target is not None:
+            lines_map[target][1].append((x, text))
+        else:
+            insort(sorted_refs, (y, len(lines_map)))
             lines_map.append((y, [(x, text)]))
 
     # Ordena linhas top -> bottom (menor y -> topo) e palavras left->right
@@ -38,106 +53,278 @@ def _reconstruct_lines_from_words(page, x_tol=3, y_tol=3):
             lines.append(line)
     return lines
 
-def extract_raw(pdf_path: str, header_height_ratio: float = 0.15, footer_height_ratio: float = 0.12) -> list[dict]:
+def _reconstruct_lines_from_words(page, x_tol=3, y_tol=3):
+    """
+    Fallback: reconstrói linhas agrupando words por proximidade vertical (y0).
+    Retorna lista de linhas já ordenadas left-to-right, top-to-bottom.
+    """
+    words = page.extract_words()
+    if not words:
+        return []
+    return _group_words_into_lines(words, y_tol=y_tol)
+
+def _split_text_lines(text: str) -> list[str]:
+    # split seguro - garantimos text ser string
+    return [ln.strip() for ln in text.split("\n") if ln and ln.strip()]
+
+def _content_limits(page, header_height_ratio: float, footer_height_ratio: float) -> tuple[float, float]:
+    """Limites verticais (topo, base) da área de conteúdo, sem a faixa de cabeçalho/rodapé."""
+    return page.height * header_height_ratio, page.height * (1 - footer_height_ratio)
+
+def _full_page_lines(page) -> list[str]:
+    """Linhas da página inteira (usadas como candidatas a cabeçalho/rodapé)."""
+    text = page.extract_text(x_tolerance=3, y_tolerance=3) or ""
+    if not text.strip():
+        # fallback: tenta reconstruir a partir de words
+        return _reconstruct_lines_from_words(page)
+    return _split_text_lines(text)
+
+def _cropped_content_lines(page, header_height_ratio: float, footer_height_ratio: float) -> list[str]:
+    """Linhas da área de conteúdo, recortando a página (crop) antes de extrair."""
+    top, bottom = _content_limits(page, header_height_ratio, footer_height_ratio)
+    content_page = page.crop(bbox=(0, top, page.width, bottom))
+
+    page_text = content_page.extract_text(x_tolerance=3, y_tolerance=3)
+
+    # Se extract_text retornou None ou vazio, tenta reconstruir por words
+    if not page_text or not page_text.strip():
+        return _reconstruct_lines_from_words(content_page)
+    return _split_text_lines(page_text)
+
+def _single_pass_lines(page, header_height_ratio: float, footer_height_ratio: float) -> tuple[list[str], list[str]]:
+    """
+    Uma única análise de layout por página: extrai as linhas da página inteira com
+    posição (extract_text_lines) e separa a área de conteúdo pelas coordenadas,
+    em vez de recortar e extrair de novo.
+    Retorna (linhas_da_pagina_inteira, linhas_do_conteudo).
+    """
+    top, bottom = _content_limits(page, header_height_ratio, footer_height_ratio)
+
+    text_lines = [ln for ln in page.extract_text_lines(x_tolerance=3, y_tolerance=3) if ln["text"].strip()]
+    if text_lines:
+        full_lines = [ln["text"].strip() for ln in text_lines]
+        # Mesma regra do crop: a linha entra se tocar a área de conteúdo
+        content_lines = [ln["text"].strip() for ln in text_lines if ln["bottom"] > top and ln["top"] < bottom]
+        return full_lines, content_lines
+
+    # fallback: reconstrói a partir de words (extraídas uma vez só)
+    words = page.extract_words()
+    if not words:
+        return [], []
+    content_words = [w for w in words if w["bottom"] > top and w["top"] < bottom]
+    return _group_words_into_lines(words), _group_words_into_lines(content_words)
+
+def _iter_page_records(pages, first_page_num: int, header_height_ratio: float, footer_height_ratio: float, single_pass: bool, header_scan_pages: int, release_pages: bool = False):
+    """
+    Gera, para cada página, um registro com as linhas de conteúdo e, nas primeiras
+    'header_scan_pages' páginas do documento, a primeira/última linha da página
+    inteira (candidatas a cabeçalho/rodapé).
+    Com 'release_pages', o cache de layout de cada página é liberado
+    (page.close()) logo depois que o registro dela é consumido.
+    """
+    for page_num, page in enumerate(pages, first_page_num):
+        collect_edges = page_num <= header_scan_pages
+        if single_pass:
+            full_lines, lines = _single_pass_lines(page, header_height_ratio, footer_height_ratio)
+        else:
+            full_lines = _full_page_lines(page) if collect_edges else []
+            lines = _cropped_content_lines(page, header_height_ratio, footer_height_ratio)
+
+        yield {
+            "page": page_num,
+            "lines": lines,
+            "edges": (full_lines[0], full_lines[-1]) if collect_edges and full_lines else None,
+        }
+        if release_pages:
+            page.close()
+
+def _extract_page_range(pdf_path: str, first_page: int, last_page: int, header_height_ratio: float, footer_height_ratio: float, single_pass: bool, header_scan_pages: int) -> list[dict]:
+    """
+    Executado nos workers: abre um handle próprio do pdfplumber só com as
+    páginas [first_page, last_page] e devolve os registros dessas páginas.
+    """
+    with pdfplumber.open(pdf_path, pages=range(first_page, last_page + 1)) as pdf:
+        return list(_iter_page_records(
+            pdf.pages, first_page, header_height_ratio, footer_height_ratio, single_pass, header_scan_pages
+        ))
+
+def _iter_page_records_parallel(pdf_path: str, n_pages: int, workers: int, chunk_size: int, header_height_ratio: float, footer_height_ratio: float, single_pass: bool, header_scan_pages: int):
+    """
+    Divide o intervalo de páginas em blocos e extrai cada bloco num processo.
+    Os registros são devolvidos na ordem das páginas, então a detecção de
+    cabeçalho/rodapé e a segmentação continuam idênticas à versão sequencial.
+    """
+    if not chunk_size:
+        # ~4 blocos por worker para equilibrar páginas mais pesadas
+        chunk_size = max(1, math.ceil(n_pages / (workers * 4)))
+    ranges = [(start, min(start + chunk_size - 1, n_pages)) for start in range(1, n_pages + 1, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _extract_page_range, pdf_path, first, last,
+                header_height_ratio, footer_height_ratio, single_pass, header_scan_pages
+            )
+            for first, last in ranges
+        ]
+        for future in futures:
+            yield from future.result()
+
+def _detect_common_edges(records: list[dict]) -> tuple:
+    """Detecta o cabeçalho/rodapé mais comuns (apenas se aparecerem >2 vezes)."""
+    header_candidates = [r["edges"][0] for r in records if r["edges"]]
+    footer_candidates = [r["edges"][1] for r in records if r["edges"]]
+
+    common_header = None
+    common_footer = None
+    if header_candidates:
+        header_count = Counter(header_candidates).most_common(1)
+        if header_count and header_count[0][1] > 2:
+            common_header = header_count[0][0]
+    if footer_candidates:
+        footer_count = Counter(footer_candidates).most_common(1)
+        if footer_count and footer_count[0][1] > 2:
+            common_footer = footer_count[0][0]
+    return common_header, common_footer
+
+def _page_blocks(record: dict, common_header, common_footer) -> list[dict]:
+    """Remove cabeçalho/rodapé de uma página e a segmenta em blocos (parágrafos)."""
+    lines = record["lines"]
+    page_num = record["page"]
+
+    # Remove cabeçalho/rodapé detectados (comparação por prefixo)
+    if common_header and lines and lines[0].startswith(common_header[:15]):
+        lines = lines[1:]
+    if common_footer and lines and lines[-1].startswith(common_footer[:15]):
+        lines = lines[:-1]
+
+    if not lines:
+        return []
+
+    # Junta linhas em um único texto para aplicar heurística semântica depois
+    page_text_clean = " ".join(lines)
+
+    # Heurística de parágrafos (divide por sentence boundaries + conectores comuns)
+    paragraph_candidates = re.split(
+        r'\.\n|(?=\b(Diante|Além disso|Assim|Portanto|Os números|Com base|Em seguida|Dessa forma|Por fim|Ciente|Dando continuidade)\b)',
+        page_text_clean
+        )
+
+    # Filtra e adiciona blocos robustos
+    blocks = []
+    for para in paragraph_candidates:
+        if not para:
+            continue
+        para = para.strip()
+        # elimina strings muito curtas (p. ex. letras soltas) — ajuste conforme necessidade
+        if len(para) < 30:
+            # se for título curto em maiúsculas, ainda pode ser útil
+            if para.isupper() and len(para) > 5:
+                pass
+            else:
+                continue
+        blocks.append({
+            "text": para,
+            "page": page_num
+        })
+    return blocks
+
+def _iter_text_blocks(records, header_scan_pages: int):
+    """
+    Consome os registros de página em fluxo: guarda as primeiras
+    'header_scan_pages' páginas, decide o cabeçalho/rodapé comum, aplica a decisão
+    retroativamente às páginas guardadas e segue página a página.
+    """
+    buffered = []
+    common_header = common_footer = None
+    decided = False
+
+    for record in records:
+        if decided:
+            yield from _page_blocks(record, common_header, common_footer)
+            continue
+
+        buffered.append(record)
+        if len(buffered) >= header_scan_pages:
+            common_header, common_footer = _detect_common_edges(buffered)
+            decided = True
+            for buffered_record in buffered:
+                yield from _page_blocks(buffered_record, common_header, common_footer)
+            buffered = []
+
+    # Documento com menos páginas que a janela de detecção
+    if not decided:
+        common_header, common_footer = _detect_common_edges(buffered)
+        for buffered_record in buffered:
+            yield from _page_blocks(buffered_record, common_header, common_footer)
+
+def iter_raw_blocks(
+    pdf_path,
+    header_height_ratio: float = 0.15,
+    footer_height_ratio: float = 0.12,
+    single_pass: bool = False,
+    header_scan_pages: int = 10,
+    workers: int = None,
+    chunk_size: int = None,
+    release_pages: bool = None
+):
+    """
+    Versão em fluxo de extract_raw: gera os blocos {"text", "page"} à medida que
+    cada página termina, sem guardar o documento inteiro em memória.
+    Só as primeiras 'header_scan_pages' páginas ficam em buffer (detecção de
+    cabeçalho/rodapé). Ao contrário de extract_raw, erros são propagados.
+
+    Com workers > 1 as páginas são divididas em blocos de 'chunk_size' páginas
+    e extraídas em paralelo, cada processo com seu próprio handle do pdfplumber.
+    'release_pages' (modo sequencial): libera cada página (page.close()) assim
+    que o seu registro sai. Por padrão só quando a sessão é aberta aqui; com
+    uma PdfDocumentSession recebida as páginas ficam em cache para as etapas
+    seguintes, a não ser que quem chama peça release_pages=True (por ser o
+    último a usar as páginas).
+    """
+    if release_pages is None:
+        release_pages = not isinstance(pdf_path, PdfDocumentSession)
+    with open_session(pdf_path) as session:
+        if workers and workers > 1:
+            records = _iter_page_records_parallel(
+                session.path, session.page_count, workers, chunk_size,
+                header_height_ratio, footer_height_ratio, single_pass, header_scan_pages
+            )
+        else:
+            records = _iter_page_records(
+                session.pages, 1, header_height_ratio, footer_height_ratio, single_pass, header_scan_pages,
+                release_pages=release_pages
+            )
+        yield from _iter_text_blocks(records, header_scan_pages)
+
+def extract_raw(
+    pdf_path,
+    header_height_ratio: float = 0.15,
+    footer_height_ratio: float = 0.12,
+    single_pass: bool = False,
+    header_scan_pages: int = 10,
+    workers: int = None,
+    chunk_size: int = None
+) -> list[dict]:
     """
     Extrai texto bruto de um PDF, removendo cabeçalhos e rodapés e segmentando em blocos (parágrafos).
     Possui fallback robusto caso page.extract_text retorne None.
-    """
-    all_text_blocks = []
-    header_candidates = []
-    footer_candidates = []
+    'pdf_path' pode ser um caminho ou uma PdfDocumentSession já aberta.
 
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            n_pages = len(pdf.pages)
-            # 1ª passada: coletar possíveis cabeçalhos/rodapés (até 10 páginas)
-            for page in pdf.pages[:min(n_pages, 10)]:
-                text = page.extract_text(x_tolerance=3, y_tolerance=3) or ""
-                if not text.strip():
-                    # fallback: tenta reconstruir a partir de words
-                    lines_fb = _reconstruct_lines_from_words(page)
-                    if not lines_fb:
-                        continue
-                    lines = lines_fb
-                else:
-                    lines = [ln.strip() for ln in text.split("\n") if ln and ln.strip()]
-
-                if len(lines) < 1:
-                    continue
-                header_candidates.append(lines[0])
-                footer_candidates.append(lines[-1])
-
-            # Detecta os mais comuns (apenas se aparecerem >2 vezes)
-            common_header = None
-            common_footer = None
-            if header_candidates:
-                header_count = Counter(header_candidates).most_common(1)
-                if header_count and header_count[0][1] > 2:
-                    common_header = header_count[0][0]
-            if footer_candidates:
-                footer_count = Counter(footer_candidates).most_common(1)
-                if footer_count and footer_count[0][1] > 2:
-                    common_footer = footer_count[0][0]
-
-            # 2ª passada: extração por página com crop + fallback e segmentação
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_height = page.height
-                page_width = page.width
-
-                content_bbox = (
-                    0,
-                    page_height * header_height_ratio,
-                    page_width,
-                    page_height * (1 - footer_height_ratio)
-                )
-                content_page = page.crop(bbox=content_bbox)
-
-                page_text = content_page.extract_text(x_tolerance=3, y_tolerance=3)
-
-                # Se extract_text retornou None ou vazio, tenta reconstruir por words
-                if not page_text or not page_text.strip():
-                    lines = _reconstruct_lines_from_words(content_page)
-                else:
-                    # split seguro - garantimos page_text ser string
-                    lines = [ln.strip() for ln in page_text.split("\n") if ln and ln.strip()]
-
-                # Remove cabeçalho/rodapé detectados (comparação por prefixo)
-                if common_header and lines and lines[0].startswith(common_header[:15]):
-                    lines = lines[1:]
-                if common_footer and lines and lines[-1].startswith(common_footer[:15]):
-                    lines = lines[:-1]
-
-                if not lines:
-                    continue
-
-                # Junta linhas em um único texto para aplicar heurística semântica depois
-                page_text_clean = " ".join(lines)
-
-                # Heurística de parágrafos (divide por sentence boundaries + conectores comuns)
-                paragraph_candidates = re.split(
-                    r'\.\n|(?=\b(Diante|Além disso|Assim|Portanto|Os números|Com base|Em seguida|Dessa forma|Por fim|Ciente|Dando continuidade)\b)',
-                    page_text_clean
-                    )
-
-                # Filtra e adiciona blocos robustos
-                for para in paragraph_candidates:
-                    if not para:
-                        continue
-                    para = para.strip()
-                    # elimina strings muito curtas (p. ex. letras soltas) — ajuste conforme necessidade
-                    if len(para) < 30:
-                        # se for título curto em maiúsculas, ainda pode ser útil
-                        if para.isupper() and len(para) > 5:
-                            pass
-                        else:
-                            continue
-                    all_text_blocks.append({
-                        "text": para,
-                        "page": page_num
-                    })
+    Por padrão as primeiras 'header_scan_pages' páginas são lidas duas vezes: inteiras
+    (para achar cabeçalho/rodapé) e recortadas (conteúdo). Com single_pass=True
+    cada página passa por uma única análise de layout; a área de conteúdo é
+    separada pelas coordenadas das linhas, o que pode diferir do crop em
+    linhas que cruzam a borda das faixas.
 
+    Com workers > 1 a extração das páginas roda num pool de processos
+    (ver iter_raw_blocks); o resultado é o mesmo da versão sequencial.
+    """
+    try:
+        return list(iter_raw_blocks(
+            pdf_path, header_height_ratio, footer_height_ratio, single_pass, header_scan_pages,
+            workers=workers, chunk_size=chunk_size
+        ))
     except Exception as e:
         print(f"❌ Erro ao processar PDF '{pdf_path}': {e}")
         return []
-
-    return all_text_blocks
@@ -1,41 +1,296 @@
 import camelot
+import hashlib
+import json
+import math
+import multiprocessing
+import signal
+import threading
+import time
 import pandas as pd
+from collections import deque
+from multiprocessing.connection import wait
 
-def extract_tables(pdf_path: str) -> list[list[list[str]]]:
+from minhash import MinHasher, MinHashLSH
+from pdf_session import PdfDocumentSession, open_session, source_path
+from table_detection import find_table_pages, pages_spec
+
+
+def _normalize_cell(cell) -> str:
+    return " ".join(str(cell).split()).lower()
+
+
+def table_fingerprint(table: list[list[str]]) -> str:
     """
-    Extrai tabelas de um arquivo PDF e as retorna em um formato estruturado.
-    Tenta extrair usando os dois 'flavors' do Camelot (lattice e stream) para maximizar a precisão.
+    Impressão digital canônica de uma tabela: hash do formato (linhas x colunas)
+    e do texto normalizado das células (espaços colapsados, minúsculas).
+    """
+    cells = [[_normalize_cell(cell) for cell in row] for row in table]
+    shape = (len(cells), max((len(row) for row in cells), default=0))
+    payload = json.dumps([shape, cells], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
 
-    Args:
-        pdf_path (str): O caminho para o arquivo PDF.
 
-    Returns:
-        list[list[list[str]]]: Uma lista de tabelas, onde cada tabela é uma lista de linhas,
-                                e cada linha é uma lista de strings (células).
+class TableDeduplicator:
     """
-    all_tables_data = []
+    Reconhece tabelas repetidas (ex: a mesma tabela lida pelo lattice e pelo
+    stream) em tempo constante por tabela: as impressões digitais ficam num set,
+    em vez de comparar cada tabela com todas as anteriores célula a célula.
+
+    Com 'near_duplicates=True', também junta tabelas quase iguais (saídas um
+    pouco diferentes do lattice e do stream para a mesma tabela): MinHash sobre
+    o conjunto de células não vazias, com índice LSH, e limiar de similaridade
+    de Jaccard 'threshold'.
+    """
+
+    def __init__(self, near_duplicates: bool = False, threshold: float = 0.8, num_perm: int = 64):
+        self._fingerprints = set()
+        self._minhasher = MinHasher(num_perm=num_perm) if near_duplicates else None
+        self._lsh = MinHashLSH(threshold=threshold, num_perm=num_perm) if near_duplicates else None
+
+    def _signature(self, table):
+        cells = {_normalize_cell(cell) for row in table for cell in row}
+        cells.discard("")
+        return self._minhasher.signature(cells) if cells else None
 
+    def is_duplicate(self, table: list[list[str]]) -> bool:
+        if table_fingerprint(table) in self._fingerprints:
+            return True
+        if self._lsh is not None:
+            signature = self._signature(table)
+            return signature is not None and self._lsh.query(signature) is not None
+        return False
+
+    def add(self, table: list[list[str]]):
+        self._fingerprints.add(table_fingerprint(table))
+        if self._lsh is not None:
+            signature = self._signature(table)
+            if signature is not None:
+                self._lsh.insert(len(self._lsh), signature)
+
+# --- Execução do Camelot por (flavor, bloco de páginas) ---
+_FLAVORS = ('lattice', 'stream')
+
+
+class _ChunkTimeout(Exception):
+    pass
+
+
+def _alarm_handler(signum, frame):
+    raise _ChunkTimeout()
+
+
+def _read_chunk(pdf_path: str, flavor: str, pages: str, timeout: float = None) -> list[dict]:
+    """
+    Roda o Camelot com um flavor num bloco de páginas e devolve as tabelas com
+    a procedência (página, flavor, bbox, ordem na página). Com 'timeout', onde
+    houver SIGALRM (Linux/macOS, thread principal) o próprio worker interrompe
+    o bloco ao estourar o tempo.
+    """
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _alarm_handler)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
     try:
-        tables_lattice = camelot.read_pdf(pdf_path, pages='all', flavor='lattice', suppress_stdout=True)
-        for table in tables_lattice:
-            df = table.df
-            all_tables_data.append(df.values.tolist())
+        tables = camelot.read_pdf(pdf_path, pages=pages, flavor=flavor, suppress_stdout=True)
+        return [
+            {
+                "pagina": int(table.page),
+                "flavor": flavor,
+                "bbox": [float(v) for v in getattr(table, "_bbox", None) or ()] or None,
+                "ordem": getattr(table, "order", None) or 0,
+                "dados": table.df.values.tolist(),
+            }
+            for table in tables
+        ]
+    except _ChunkTimeout:
+        raise TimeoutError(f"flavor='{flavor}', páginas {pages}: tempo limite de {timeout}s excedido")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def _page_chunks(pages: list[int], chunk_size: int) -> list[str]:
+    return [pages_spec(pages[i:i + chunk_size]) for i in range(0, len(pages), chunk_size)]
+
+
+def _chunk_process(conn, pdf_path: str, flavor: str, pages: str):
+    """Processo de um bloco: manda ("ok", tabelas) ou ("erro", mensagem) pelo pipe."""
+    try:
+        conn.send(("ok", _read_chunk(pdf_path, flavor, pages)))
     except Exception as e:
-        print(f"Aviso: Erro ao extrair tabelas com flavor='lattice': {e}")
+        conn.send(("erro", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
 
+
+def _read_chunks_parallel(pdf_path: str, tasks: list[tuple[str, str]], workers: int, timeout: float = None) -> list[list[dict]]:
+    """
+    Roda cada (flavor, bloco de páginas) num processo próprio, no máximo
+    'workers' ao mesmo tempo. Cada bloco tem prazo de 'timeout' segundos a
+    partir do início do seu processo: estourado o prazo, o processo é
+    encerrado (terminate) e o bloco vira lista vazia com aviso, como um bloco
+    que falhe. Os demais blocos seguem normalmente.
+    """
+    results = [[] for _ in tasks]
+    waiting = deque(range(len(tasks)))
+    running = {}  # pipe -> (índice da tarefa, processo, prazo)
     try:
-        tables_stream = camelot.read_pdf(pdf_path, pages='all', flavor='stream', suppress_stdout=True)
-        for table in tables_stream:
-            df = table.df
+        while waiting or running:
+            while waiting and len(running) < workers:
+                i = waiting.popleft()
+                flavor, pages = tasks[i]
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=_chunk_process, args=(sender, pdf_path, flavor, pages))
+                process.start()
+                sender.close()
+                running[receiver] = (i, process, time.monotonic() + timeout if timeout else None)
 
-            if df.values.tolist() not in all_tables_data:
-                all_tables_data.append(df.values.tolist())
-    except Exception as e:
-        print(f"Aviso: Erro ao extrair tabelas com flavor='stream': {e}")
+            deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+            wait_time = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for receiver in wait(list(running), timeout=wait_time):
+                i, process, _ = running.pop(receiver)
+                flavor, pages = tasks[i]
+                try:
+                    status, payload = receiver.recv()
+                except EOFError:
+                    # O processo morreu sem responder (ex: falta de memória)
+                    status, payload = "erro", "o processo do bloco terminou sem resultado"
+                receiver.close()
+                process.join()
+                if status == "ok":
+                    results[i] = payload
+                else:
+                    print(f"Aviso: Erro ao extrair tabelas com flavor='{flavor}', páginas {pages}: {payload}")
+
+            now = time.monotonic()
+            for receiver, (i, process, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    # Um bloco patológico não pode segurar o documento
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    flavor, pages = tasks[i]
+                    print(f"Aviso: Tabelas com flavor='{flavor}', páginas {pages}: tempo limite excedido, bloco ignorado.")
+    finally:
+        for receiver, (_, process, _) in running.items():
+            process.terminate()
+            process.join()
+            receiver.close()
+    return results
+
+
+def extract_tables_with_provenance(pdf_path, pre_scan: bool = False, near_duplicates: bool = False,
+                                   near_duplicate_threshold: float = 0.8, workers: int = None,
+                                   chunk_size: int = None, chunk_timeout: float = None) -> list[dict]:
+    """
+    Igual a extract_tables, mas cada tabela vem com a procedência:
+    {"pagina", "flavor", "bbox", "dados"}, em ordem de página (e, na mesma
+    página, lattice antes de stream, na ordem em que o Camelot as encontrou).
+
+    Com 'workers' > 1, as páginas são divididas em blocos de 'chunk_size' e cada
+    par (flavor, bloco) roda num processo próprio, até 'workers' ao mesmo tempo.
+    'chunk_timeout' (segundos) limita cada bloco, para que uma página
+    patológica não trave o documento. No modo sequencial, com 'chunk_timeout'
+    as páginas também são divididas em blocos de 'chunk_size' (padrão: 1
+    página), cada um com o seu limite; sem ele, cada flavor lê todas as
+    páginas de uma vez.
+    """
+    # A sessão só é dona das páginas se foi aberta aqui
+    owns_session = not isinstance(pdf_path, PdfDocumentSession)
+    with open_session(pdf_path) as session:
+        page_count = session.page_count
+        if pre_scan:
+            try:
+                pages = find_table_pages(session, release_pages=owns_session)
+            except Exception as e:
+                print(f"Aviso: Erro na pré-varredura de tabelas, analisando todas as páginas: {e}")
+                pages = list(range(1, page_count + 1))
+            if not pages:
+                return []
+        else:
+            pages = list(range(1, page_count + 1))
+
+    pdf_path = source_path(pdf_path)
+    if workers and workers > 1:
+        chunk_size = chunk_size or max(1, math.ceil(len(pages) / (workers * 2)))
+        tasks = [(flavor, chunk) for flavor in _FLAVORS for chunk in _page_chunks(pages, chunk_size)]
+        chunk_results = _read_chunks_parallel(pdf_path, tasks, workers, chunk_timeout)
+    else:
+        if chunk_timeout:
+            # Um limite por bloco de páginas: uma página lenta só perde o seu bloco
+            tasks = [(flavor, chunk) for flavor in _FLAVORS for chunk in _page_chunks(pages, chunk_size or 1)]
+        else:
+            # Sequencial: um bloco por flavor com todas as páginas (como antes)
+            tasks = [(flavor, pages_spec(pages) if pre_scan else 'all') for flavor in _FLAVORS]
+        chunk_results = []
+        for flavor, chunk in tasks:
+            try:
+                chunk_results.append(_read_chunk(pdf_path, flavor, chunk, chunk_timeout))
+            except TimeoutError as e:
+                print(f"Aviso: Tabelas com {e}; bloco ignorado.")
+                chunk_results.append([])
+            except Exception as e:
+                print(f"Aviso: Erro ao extrair tabelas com flavor='{flavor}', páginas {chunk}: {e}")
+                chunk_results.append([])
+
+    by_flavor = {flavor: [] for flavor in _FLAVORS}
+    for (flavor, _), tables in zip(tasks, chunk_results):
+        by_flavor[flavor].extend(tables)
+
+    # Lattice primeiro (todas mantidas), depois stream sem as repetidas
+    deduplicator = TableDeduplicator(near_duplicates=near_duplicates, threshold=near_duplicate_threshold)
+    kept = []
+    for table in by_flavor['lattice']:
+        kept.append(table)
+        deduplicator.add(table["dados"])
+    for table in by_flavor['stream']:
+        if not deduplicator.is_duplicate(table["dados"]):
+            kept.append(table)
+            deduplicator.add(table["dados"])
+
+    flavor_rank = {flavor: i for i, flavor in enumerate(_FLAVORS)}
+    kept.sort(key=lambda t: (t["pagina"], flavor_rank[t["flavor"]], t["ordem"]))
 
     cleaned_tables = []
-    for table in all_tables_data:
-        if len(table) > 1 and any(cell.strip() for row in table for cell in row):
-            cleaned_tables.append(table)
+    for table in kept:
+        data = table["dados"]
+        if len(data) > 1 and any(cell.strip() for row in data for cell in row):
+            cleaned_tables.append({"pagina": table["pagina"], "flavor": table["flavor"], "bbox": table["bbox"], "dados": data})
+    return cleaned_tables
+
 
-    return cleaned_tables
\ No newline at end of file
+def extract_tables(pdf_path, pre_scan: bool = False, near_duplicates: bool = False,
+                   near_duplicate_threshold: float = 0.8, workers: int = None,
+                   chunk_size: int = None, chunk_timeout: float = None) -> list[list[list[str]]]:
+    """
+    Extrai tabelas de um arquivo PDF e as retorna em um formato estruturado.
+    Tenta extrair usando os dois 'flavors' do Camelot (lattice e stream) para maximizar a precisão.
+
+    Args:
+        pdf_path (str | PdfDocumentSession): O caminho para o arquivo PDF ou a sessão já aberta.
+                                             (O Camelot só lê arquivos, então usamos o caminho da sessão.)
+        pre_scan (bool): Se True, uma pré-varredura barata (table_detection.find_table_pages:
+                         linhas de grade e colunas de texto alinhadas) escolhe as páginas que
+                         provavelmente têm tabelas e o Camelot roda só nelas. Desligada por
+                         padrão: tabelas em páginas não marcadas seriam perdidas, então só vale
+                         ligá-la quando benchmarks/bench_table_prescan.py der recall de 100%.
+        near_duplicates (bool): Além das tabelas idênticas (impressão digital), descarta as
+                                tabelas do stream quase iguais a uma já extraída (MinHash).
+        near_duplicate_threshold (float): Similaridade de Jaccard mínima entre as células.
+        workers (int): Com mais de 1, roda os pares (flavor, bloco de páginas) em paralelo.
+        chunk_size (int): Páginas por bloco no modo paralelo (e no sequencial com chunk_timeout).
+        chunk_timeout (float): Tempo máximo (s) de cada bloco; blocos estourados são ignorados.
+
+    Returns:
+        list[list[list[str]]]: Uma lista de tabelas, onde cada tabela é uma lista de linhas,
+                                e cada linha é uma lista de strings (células), em ordem de página.
+                                (extract_tables_with_provenance devolve também página, flavor e bbox.)
+    """
+    tables = extract_tables_with_provenance(
+        pdf_path, pre_scan=pre_scan, near_duplicates=near_duplicates,
+        near_duplicate_threshold=near_duplicate_threshold, workers=workers,
+        chunk_size=chunk_size, chunk_timeout=chunk_timeout
+    )
+    return [table["dados"] for table in tables]
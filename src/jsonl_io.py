@@ -0,0 +1,107 @@
+import json
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+# Campos do documento repetidos em toda linha do JSONL; no modo compacto vão
+# uma única vez num registro de cabeçalho e as linhas só guardam o doc_id
+CAMPOS_DOCUMENTO = ("nome_doc", "metadados_doc", "estrutura_global")
+TIPO_CABECALHO = "cabecalho_documento"
+
+
+def dumps_linha(registro: Dict[str, Any]) -> bytes:
+    """Serializa um registro como uma linha JSONL (UTF-8, sem escapar acentos)."""
+    if orjson is not None:
+        return orjson.dumps(registro) + b"\n"
+    return (json.dumps(registro, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+def loads_linha(linha) -> Dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(linha)
+    return json.loads(linha)
+
+
+class JsonlWriter:
+    """
+    Escritor de JSONL com serialização rápida (orjson, se instalado) e escrita
+    em lotes de 'buffer_linhas' linhas.
+
+    Com 'compacto=True', os campos de documento (CAMPOS_DOCUMENTO) saem uma
+    vez, num registro {"tipo_registro": "cabecalho_documento", "doc_id", ...}
+    antes da primeira linha do documento, e as linhas guardam só o doc_id.
+    iter_registros (e o rag_pipeline.loader) leem os dois formatos.
+
+    Uso:
+        with JsonlWriter("saida.jsonl", compacto=True) as writer:
+            for bloco in blocos:
+                writer.write(bloco)
+    """
+
+    def __init__(self, path: str, compacto: bool = False, buffer_linhas: int = 1000):
+        self.path = path
+        self.compacto = compacto
+        self.buffer_linhas = buffer_linhas
+        self.linhas = 0
+        self._buffer = []
+        self._cabecalhos = set()
+        self._file = open(path, 'wb')
+
+    def write(self, registro: Dict[str, Any]):
+        if self.compacto:
+            doc_id = registro.get("doc_id")
+            if doc_id not in self._cabecalhos:
+                self._cabecalhos.add(doc_id)
+                cabecalho = {"tipo_registro": TIPO_CABECALHO, "doc_id": doc_id}
+                cabecalho.update({campo: registro.get(campo) for campo in CAMPOS_DOCUMENTO})
+                self._buffer.append(dumps_linha(cabecalho))
+            registro = {chave: valor for chave, valor in registro.items() if chave not in CAMPOS_DOCUMENTO}
+        self._buffer.append(dumps_linha(registro))
+        self.linhas += 1
+        if len(self._buffer) >= self.buffer_linhas:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer.clear()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_registros(path: str, expandir: bool = True, avisos: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lê um JSONL no formato normal ou compacto e gera só as linhas de bloco.
+    Com 'expandir', os campos do cabeçalho do documento são copiados de volta
+    em cada linha (o mesmo registro do formato normal). Linhas corrompidas são
+    puladas com um aviso ('avisos' é o nome mostrado; padrão: o caminho).
+    """
+    cabecalhos = {}
+    with open(path, 'rb') as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            try:
+                registro = loads_linha(linha)
+            except ValueError:
+                print(f"Aviso: Linha mal formatada pulada em {avisos or path}")
+                continue
+            if registro.get("tipo_registro") == TIPO_CABECALHO:
+                cabecalhos[registro.get("doc_id")] = {campo: registro.get(campo) for campo in CAMPOS_DOCUMENTO}
+                continue
+            if expandir and registro.get("doc_id") in cabecalhos:
+                for campo, valor in cabecalhos[registro["doc_id"]].items():
+                    registro.setdefault(campo, valor)
+            yield registro
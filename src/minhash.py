@@ -0,0 +1,160 @@
+import hashlib
+from collections import defaultdict
+from typing import Hashable, Iterable, List, Optional
+
+import numpy as np
+
+# Primo de Mersenne 2^61 - 1: as permutações são h -> (a*h + b) mod _PRIME.
+# Com h < 2^32, a < 2^32 e b < 2^31 o produto cabe em uint64 sem estourar.
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _base_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+def normalize_for_hash(text: str) -> str:
+    """Texto em minúsculas e com espaços colapsados (base dos hashes de texto)."""
+    return " ".join((text or "").lower().split())
+
+
+def shingles(text: str, size: int = 5) -> set:
+    """Conjunto de 'size' palavras consecutivas (o texto inteiro, se for mais curto)."""
+    words = normalize_for_hash(text).split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    Assinaturas MinHash de conjuntos de tokens (células de tabela, shingles de
+    texto...). A fração de posições iguais entre duas assinaturas estima a
+    similaridade de Jaccard entre os conjuntos.
+    Cada token é hasheado uma única vez; as 'num_perm' permutações são funções
+    lineares sobre esse hash, calculadas de uma vez com NumPy.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter({_base_hash(token) for token in tokens}, dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = (hashes[:, None] * self._a[None, :] + self._b[None, :]) % _PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+    @staticmethod
+    def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Similaridade de Jaccard estimada entre duas assinaturas."""
+        return float(np.mean(sig_a == sig_b))
+
+
+class MinHashLSH:
+    """
+    Índice LSH (bandas) sobre assinaturas MinHash: só itens que coincidem em
+    ao menos uma banda são comparados, em vez de todos contra todos.
+
+    Uso:
+        lsh = MinHashLSH(threshold=0.8, num_perm=64)
+        duplicado_de = lsh.query(assinatura)   # chave do item parecido ou None
+        lsh.insert("tabela-3", assinatura)
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: Optional[int] = None):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands or self._optimal_bands(threshold, num_perm)
+        self.rows = num_perm // self.bands
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures = {}
+
+    @staticmethod
+    def _optimal_bands(threshold: float, num_perm: int) -> int:
+        """
+        Escolhe o número de bandas cujo limiar aproximado (1/b)^(1/r) fica mais
+        perto de 'threshold' (divisores exatos de num_perm).
+        """
+        options = [b for b in range(1, num_perm + 1) if num_perm % b == 0]
+        return min(options, key=lambda b: abs((1 / b) ** (b / num_perm) - threshold))
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def candidates(self, signature: np.ndarray) -> List[Hashable]:
+        found = []
+        seen = set()
+        for band, key in self._band_keys(signature):
+            for item in self._buckets[band].get(key, ()):
+                if item not in seen:
+                    seen.add(item)
+                    found.append(item)
+        return found
+
+    def query(self, signature: np.ndarray) -> Optional[Hashable]:
+        """Primeiro item inserido com similaridade estimada >= threshold, ou None."""
+        for item in self.candidates(signature):
+            if MinHasher.similarity(signature, self._signatures[item]) >= self.threshold:
+                return item
+        return None
+
+    def insert(self, key: Hashable, signature: np.ndarray):
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band][band_key].append(key)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+class TextPrefilter:
+    """
+    Pré-filtro barato de textos repetidos, para rodar ANTES do modelo de
+    embedding: descarta cópias exatas (hash do texto normalizado) e, com
+    'near_duplicates', quase-cópias (MinHash LSH sobre shingles de palavras,
+    similaridade de Jaccard >= 'threshold'). O estado vale entre arquivos,
+    como o índice de embeddings.
+
+    Uso:
+        prefiltro = TextPrefilter()
+        candidatos = [b for b in blocos if prefiltro.is_new(b["texto_normalizado"])]
+        print(prefiltro.stats())
+    """
+
+    def __init__(self, near_duplicates: bool = True, threshold: float = 0.9,
+                 num_perm: int = 64, shingle_size: int = 5):
+        self.shingle_size = shingle_size
+        self._hashes = set()
+        self._minhasher = MinHasher(num_perm=num_perm) if near_duplicates else None
+        self._lsh = MinHashLSH(threshold=threshold, num_perm=num_perm) if near_duplicates else None
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.passed = 0
+
+    def is_new(self, text: str) -> bool:
+        """True se o texto não é cópia (nem quase-cópia) de um já visto; registra-o."""
+        normalized = normalize_for_hash(text)
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+        if digest in self._hashes:
+            self.exact_duplicates += 1
+            return False
+        self._hashes.add(digest)
+
+        if self._lsh is not None:
+            signature = self._minhasher.signature(shingles(normalized, self.shingle_size))
+            if self._lsh.query(signature) is not None:
+                self.near_duplicates += 1
+                return False
+            self._lsh.insert(len(self._lsh), signature)
+
+        self.passed += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"exatas": self.exact_duplicates, "quase": self.near_duplicates, "aprovados": self.passed}
@@ -1,11 +1,451 @@
+import os
 import re
+import json
 import string
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from unidecode import unidecode
 
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava de arquivo (um processo por cache)
+    fcntl = None
+
+# Remove todos os caracteres de string.punctuation (Etapa 5 de normalize_text)
+_PUNCTUATION_TRANSLATOR = str.maketrans('', '', string.punctuation)
+
+# Perfis de normalização:
+#  - "padrao": normalize_text de src (expande e remove toda a pontuação)
+#  - "rag":    normalização usada pelos notebooks nos blocos e nas perguntas
+#              (mantém a sigla junto da expansão e preserva ". , -")
+PROFILES = ("padrao", "rag")
+
+# Caracteres removidos no perfil "rag"; a variante _BATCH preserva o separador
+# usado para normalizar vários textos numa única string
+_RAG_DISALLOWED = re.compile(r'[^a-z0-9\s.,-]')
+_BATCH_SEPARATOR = "\x00"
+_RAG_DISALLOWED_BATCH = re.compile(r'[^a-z0-9\s.,\x00-]')
+_WHITESPACE = re.compile(r'\s+')
+_LINE_HYPHENATION = re.compile(r'-\n\s*')
+
+
+def _build_trie_pattern(keys) -> str:
+    """
+    Monta uma regex em forma de trie (prefixos compartilhados) a partir das chaves
+    em minúsculas. Em cada nó só um filho pode casar com o próximo caractere, e a
+    continuação vem antes do fim da chave (quantificador guloso), então o motor
+    tenta sempre a chave mais longa primeiro e recua para a mais curta se o \\b
+    final falhar — o mesmo resultado de uma alternância ordenada por tamanho,
+    mas sem testar as milhares de chaves em cada posição do texto.
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def _node_pattern(node) -> str:
+        is_terminal = "" in node
+        branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if is_terminal else group
+
+    return _node_pattern(trie)
+
+
+def dictionary_fingerprint(acronyms: dict = None, standardization_map: dict = None, profile: str = "padrao") -> str:
+    """
+    Impressão digital do conteúdo dos dicionários (e do perfil). Editar o
+    dicionarios.json muda a impressão digital, o que invalida automaticamente
+    as entradas do NormalizationCache calculadas com a versão anterior.
+    """
+    payload = json.dumps(
+        {"acronyms": acronyms or {}, "standardization_map": standardization_map or {}, "profile": profile},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class CompiledNormalizer:
+    """
+    Pipeline de normalize_text pré-compilado a partir dos dicionários de siglas e
+    padronização. Todas as chaves viram UMA regex (trie) compilada uma única vez,
+    e as substituições são aplicadas numa única passada sobre o texto, com as
+    mesmas regras: chave mais longa primeiro, limite de palavra (\\b) e sem
+    diferenciar maiúsculas/minúsculas.
+
+    Diferenças para o laço antigo (uma re.sub por chave, da mais longa para a
+    mais curta, na ordem do dicionário entre chaves de mesmo tamanho):
+      - o texto já substituído não é varrido de novo, então uma expansão nunca
+        é reexpandida por outra chave;
+      - chaves que se sobrepõem no texto (uma ocorrência começa dentro da outra)
+        ou que são prefixo uma da outra: a passada única fica com a ocorrência
+        que começa mais à esquerda e, na mesma posição, com a mais longa; o
+        laço substituía primeiro a chave mais longa em todo o texto, mesmo que
+        uma chave mais curta começasse antes.
+    Com os dicionários de data/input as duas versões dão a mesma saída em todos
+    os textos de data/output (conferido em benchmarks/bench_normalizer.py).
+
+    O perfil "rag" reproduz byte a byte a normalização dos notebooks:
+    minúsculas e unidecode primeiro, depois uma re.sub por chave, na ordem do
+    dicionário e com as chaves como vieram (a comparação diferencia caixa:
+    chaves em maiúsculas não casam com o texto já em minúsculas); siglas viram
+    "sigla expansão", a padronização vem depois e só ". , -" sobrevivem como
+    pontuação. Só o pré-processamento das regexes é reaproveitado.
+
+    Uso:
+        normalizer = CompiledNormalizer.from_json("data/input/dicionarios.json")
+        texto = normalizer.normalize(texto_bruto)
+        textos = normalizer.normalize_many(lista_de_textos)
+    """
+
+    def __init__(self, acronyms: dict = None, standardization_map: dict = None, profile: str = "padrao"):
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil de normalização desconhecido: '{profile}'. Use um de {PROFILES}.")
+        self.profile = profile
+        self.acronyms = dict(acronyms or {})
+        self.standardization_map = dict(standardization_map or {})
+        self.fingerprint = dictionary_fingerprint(self.acronyms, self.standardization_map, profile)
+
+        self._pattern = None
+        self._rag_steps = []
+
+        if profile == "rag":
+            # Mesmo laço dos notebooks: uma re.sub por chave, na ordem do
+            # dicionário, com as chaves como vieram (sem mudar a caixa)
+            self._rag_steps = [
+                (re.compile(r'\b' + re.escape(key) + r'\b'), f"{key} {value}")
+                for key, value in self.acronyms.items()
+            ] + [
+                (re.compile(r'\b' + re.escape(key) + r'\b'), value)
+                for key, value in self.standardization_map.items()
+            ]
+            return
+
+        # Mesma precedência de normalize_text: siglas sobrescrevem a padronização
+        combined_map = {**self.standardization_map, **self.acronyms}
+        sorted_keys = sorted((k for k in combined_map if k), key=len, reverse=True)
+
+        # Chaves que só diferem na caixa: vale a primeira na ordem de aplicação
+        self._replacements = {}
+        for key in sorted_keys:
+            self._replacements.setdefault(key.lower(), combined_map[key])
+
+        if self._replacements:
+            trie = _build_trie_pattern(self._replacements)
+            self._pattern = re.compile(r'\b' + trie + r'\b', flags=re.IGNORECASE)
+
+    @classmethod
+    def from_json(cls, dictionaries_path, profile: str = "padrao") -> "CompiledNormalizer":
+        """Carrega 'acronyms' e 'standardization_map' de um dicionarios.json."""
+        with open(dictionaries_path, 'r', encoding='utf-8') as f:
+            dictionaries = json.load(f)
+        return cls(dictionaries.get("acronyms", {}), dictionaries.get("standardization_map", {}), profile=profile)
+
+    def _replace(self, match: re.Match) -> str:
+        found = match.group(0)
+        return self._replacements.get(found.lower(), found)
+
+    def expand(self, text: str) -> str:
+        """Etapa 2: expansão de siglas e padronização de termos, numa única passada."""
+        if self.profile == "rag":
+            for pattern, replacement in self._rag_steps:
+                text = pattern.sub(replacement, text)
+            return text
+        if self._pattern is None:
+            return text
+        return self._pattern.sub(self._replace, text)
+
+    def _normalize(self, text: str, disallowed: re.Pattern) -> str:
+        """Etapas de normalização sem o strip final (compartilhadas com normalize_many)."""
+        if self.profile == "rag":
+            text = self.expand(unidecode(text.lower()))
+            text = disallowed.sub('', text)
+            return _WHITESPACE.sub(' ', text)
+
+        # Etapa 1: Correção de hifenização e quebras de linha
+        text = _LINE_HYPHENATION.sub('', text)
+        text = text.replace('\n', ' ')
+
+        # Etapa 2: Expansão de siglas e padronização de termos
+        text = self.expand(text)
+
+        # Etapas 3 e 4: minúsculas e remoção de acentos
+        text = unidecode(text.lower())
+
+        # Etapa 5: Remoção de pontuação
+        text = text.translate(_PUNCTUATION_TRANSLATOR)
+
+        # Etapa 6: Normalização de espaços em branco
+        return _WHITESPACE.sub(' ', text)
+
+    def normalize(self, raw_text: str) -> str:
+        """Executa todas as etapas de normalize_text com o dicionário já compilado."""
+        if not isinstance(raw_text, str):
+            return ""
+        return self._normalize(raw_text, _RAG_DISALLOWED).strip()
+
+    def normalize_many(self, texts) -> list[str]:
+        """
+        Normaliza uma lista de textos de uma vez: os textos são unidos por um
+        separador que nenhuma etapa altera, o pipeline roda UMA vez sobre a
+        string inteira e o resultado é dividido de volta, na mesma ordem.
+        O separador não é caractere de palavra, então os limites \\b das chaves
+        se comportam como nas pontas de cada texto.
+        """
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        if not texts:
+            return []
+        if any(_BATCH_SEPARATOR in t for t in texts):
+            return [self.normalize(t) for t in texts]
+        joined = self._normalize(_BATCH_SEPARATOR.join(texts), _RAG_DISALLOWED_BATCH)
+        return [part.strip() for part in joined.split(_BATCH_SEPARATOR)]
+
+    __call__ = normalize
+
+
+# Normalizadores já compilados, por conteúdo dos dicionários (normalize_text é
+# chamada muitas vezes com os mesmos dicionários)
+_NORMALIZER_CACHE = {}
+_NORMALIZER_CACHE_SIZE = 8
+
+
+def get_normalizer(acronyms: dict = None, standardization_map: dict = None, profile: str = "padrao") -> CompiledNormalizer:
+    """Retorna um CompiledNormalizer reaproveitado para o mesmo par de dicionários."""
+    cache_key = (tuple((acronyms or {}).items()), tuple((standardization_map or {}).items()), profile)
+    normalizer = _NORMALIZER_CACHE.get(cache_key)
+    if normalizer is None:
+        if len(_NORMALIZER_CACHE) >= _NORMALIZER_CACHE_SIZE:
+            _NORMALIZER_CACHE.pop(next(iter(_NORMALIZER_CACHE)))
+        normalizer = CompiledNormalizer(acronyms, standardization_map, profile)
+        _NORMALIZER_CACHE[cache_key] = normalizer
+    return normalizer
+
+
+class NormalizationCache:
+    """
+    Cache LRU (limitado a 'maxsize' entradas) de textos já normalizados.
+
+    Os regulamentos repetem muito texto entre documentos (cabeçalhos, preâmbulos
+    de artigos, citações legais); com o cache cada ocorrência repetida custa
+    só um hash. A chave é (impressão digital dos dicionários, hash do texto),
+    então editar o dicionarios.json invalida as entradas antigas sem precisar
+    limpar nada: elas simplesmente deixam de ser encontradas e saem pelo LRU
+    (e não são gravadas de novo em disco).
+
+    Com 'path', as entradas são carregadas de / gravadas em um arquivo JSON.
+    save() mescla com o que já estiver no arquivo sob uma trava exclusiva
+    ('<path>.lock'), então execuções simultâneas não perdem entradas. Num
+    pool de processos, os workers não gravam: devolvem as entradas novas
+    (pop_new_entries) e o processo principal as junta (update) e grava uma
+    vez no fim.
+
+    Uso:
+        cache = NormalizationCache(maxsize=100_000, path="data/cache/normalizacao.json")
+        textos = normalize_batch(textos_brutos, acronyms, standardization_map, cache=cache)
+        print(cache.stats())
+        cache.save()
+    """
+
+    # Versão 2: o perfil "rag" voltou ao laço dos notebooks; entradas da versão
+    # anterior (calculadas com as chaves em minúsculas) são descartadas
+    FORMAT_VERSION = 2
+
+    def __init__(self, maxsize: int = 100_000, path=None):
+        self.maxsize = maxsize
+        self.path = str(path) if path else None
+        self._entries = OrderedDict()
+        self._new_entries = OrderedDict()
+        self._active_fingerprints = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path:
+            self.load()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+    def get(self, fingerprint: str, text: str):
+        """Texto normalizado em cache, ou None (contabiliza acerto/falha)."""
+        self._active_fingerprints.add(fingerprint)
+        key = (fingerprint, self.text_hash(text))
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, fingerprint: str, text: str, normalized: str):
+        self._active_fingerprints.add(fingerprint)
+        key = (fingerprint, self.text_hash(text))
+        self._entries[key] = normalized
+        self._entries.move_to_end(key)
+        if self.path:
+            # Só caches persistentes guardam o que ainda falta gravar
+            self._new_entries[key] = normalized
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop_new_entries(self) -> list:
+        """Entradas [impressão digital, hash, texto] criadas desde a última chamada."""
+        entries = [[fp, digest, value] for (fp, digest), value in self._new_entries.items()]
+        self._new_entries.clear()
+        return entries
+
+    def update(self, entries):
+        """Junta entradas de outro processo (formato de pop_new_entries)."""
+        for fingerprint, digest, normalized in entries:
+            key = (fingerprint, digest)
+            self._active_fingerprints.add(fingerprint)
+            self._entries[key] = normalized
+            self._entries.move_to_end(key)
+            if self.path:
+                self._new_entries[key] = normalized
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._new_entries.clear()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Estatísticas de uso: acertos, falhas, taxa de acerto, tamanho e remoções."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "evictions": self.evictions,
+        }
+
+    # --- Persistência em disco ---
+    def _read_file(self) -> list:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"-> AVISO: cache de normalização '{self.path}' ilegível, ignorando ({e}).")
+            return []
+        if data.get("versao") != self.FORMAT_VERSION:
+            return []
+        return data.get("entradas", [])
+
+    def load(self):
+        """Carrega as entradas do arquivo (as mais recentes ficam no fim do LRU)."""
+        for fingerprint, digest, normalized in self._read_file()[-self.maxsize:]:
+            self._entries[(fingerprint, digest)] = normalized
+
+    @contextmanager
+    def _file_lock(self):
+        """Trava exclusiva (fcntl.flock) em '<path>.lock' durante leitura + gravação."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self):
+        """
+        Grava o cache no arquivo de forma atômica, mesclando com o conteúdo atual
+        sob a trava do arquivo. Só são mantidas entradas das impressões digitais
+        usadas nesta execução, para que versões antigas do dicionário não
+        acumulem no disco. Sem entradas novas desde o último save, não grava.
+        """
+        if not self.path or not self._new_entries:
+            return
+        with self._file_lock():
+            self._save_locked()
+        self._new_entries.clear()
+
+    def _save_locked(self):
+        merged = OrderedDict()
+        for fingerprint, digest, normalized in self._read_file():
+            merged[(fingerprint, digest)] = normalized
+        for key, normalized in self._entries.items():
+            merged[key] = normalized
+            merged.move_to_end(key)
+        if self._active_fingerprints:
+            merged = OrderedDict((k, v) for k, v in merged.items() if k[0] in self._active_fingerprints)
+        entries = [[fp, digest, value] for (fp, digest), value in merged.items()][-self.maxsize:]
+
+        temp_path = f"{self.path}.{os.getpid()}.temp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"versao": self.FORMAT_VERSION, "entradas": entries}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def __repr__(self) -> str:
+        return f"NormalizationCache(size={len(self._entries)}, maxsize={self.maxsize}, path={self.path!r})"
+
+
+# Cache usado por padrão por normalize_text, iter_normalize_text e normalize_batch
+_DEFAULT_CACHE = NormalizationCache()
+
+
+def get_cache() -> NormalizationCache:
+    """Cache de normalização padrão do processo."""
+    return _DEFAULT_CACHE
+
+
+def configure_cache(maxsize: int = 100_000, path=None) -> NormalizationCache:
+    """Substitui o cache padrão (ex: para habilitar a persistência em disco)."""
+    global _DEFAULT_CACHE
+    _DEFAULT_CACHE = NormalizationCache(maxsize=maxsize, path=path)
+    return _DEFAULT_CACHE
+
+
+def _resolve_cache(cache):
+    """None usa o cache padrão; False desativa o cache."""
+    if cache is None:
+        return _DEFAULT_CACHE
+    if cache is False:
+        return None
+    return cache
+
+
+def _normalize_cached(normalizer: CompiledNormalizer, raw_text: str, cache) -> str:
+    if cache is None or not isinstance(raw_text, str):
+        return normalizer.normalize(raw_text)
+    normalized = cache.get(normalizer.fingerprint, raw_text)
+    if normalized is None:
+        normalized = normalizer.normalize(raw_text)
+        cache.put(normalizer.fingerprint, raw_text, normalized)
+    return normalized
+
+
 def normalize_text(
     raw_text: str,
     acronyms: dict = None,
-    standardization_map: dict = None
+    standardization_map: dict = None,
+    profile: str = "padrao",
+    cache=None
 ) -> str:
     """
     Normaliza o texto, realizando uma série de etapas de limpeza e padronização.
@@ -24,54 +464,132 @@ def normalize_text(
                          Ex: {"PPC": "Projeto Pedagógico de Curso"}.
         standardization_map (dict): Dicionário para padronizar termos.
                                      Ex: {"discente": "aluno", "docente": "professor"}.
+        profile (str): "padrao" (etapas acima) ou "rag" (normalização dos
+                       notebooks, ver CompiledNormalizer).
+        cache (NormalizationCache): Cache de textos já normalizados. None usa o
+                                    cache padrão do processo; False desativa.
 
     Returns:
         str: O texto normalizado e limpo.
     """
-    if acronyms is None:
-        acronyms = {}
-    if standardization_map is None:
-        standardization_map = {}
-
-    # Etapa 1: Correção de hifenização e quebras de linha
-    # Remove o hífen no final de uma linha e junta a palavra com a continuação na próxima linha.
-    # Ex: "gradua-\nção" -> "graduação"
-    normalized_text = re.sub(r'-\n\s*', '', raw_text)
-    # Substitui quebras de linha por espaço para unificar o texto em um fluxo contínuo.
-    normalized_text = normalized_text.replace('\n', ' ')
-
-    # Etapa 2: Expansão de siglas e padronização de termos
-    # Unifica os dois dicionários para uma única passada de substituição.
-    # A padronização vem primeiro para evitar conflitos com siglas.
-    combined_map = {**standardization_map, **acronyms}
-
-    # Ordena as chaves por comprimento, da maior para a menor, para evitar substituições parciais
-    # Ex: substituir "BCC" antes de uma hipotética sigla "BC".
-    sorted_keys = sorted(combined_map.keys(), key=len, reverse=True)
-
-    for key in sorted_keys:
-        # Usa \b (word boundary) para garantir que estamos substituindo a palavra/sigla inteira.
-        # re.escape trata caracteres especiais que possam existir na chave (ex: pontos em U.S.A.).
-        pattern = r'\b' + re.escape(key) + r'\b'
-        # Usa re.IGNORECASE para capturar variações como 'ppc' ou 'PPC'.
-        normalized_text = re.sub(pattern, combined_map[key], normalized_text, flags=re.IGNORECASE)
-
-    # Etapa 3: Conversão para minúsculas
-    # Padroniza todo o texto para caixa baixa, facilitando comparações e processamento.
-    normalized_text = normalized_text.lower()
-
-    # Etapa 4: Remoção de acentos
-    # Translitera caracteres acentuados para suas versões não acentuadas (ex: 'ção' -> 'cao').
-    normalized_text = unidecode(normalized_text)
-
-    # Etapa 5: Remoção de pontuação
-    # Cria um tradutor que remove todos os caracteres de pontuação definidos em string.punctuation.
-    # Esta é uma abordagem "agressiva". Em alguns cenários, pode ser útil manter hífens ou outros sinais.
-    translator = str.maketrans('', '', string.punctuation)
-    normalized_text = normalized_text.translate(translator)
-
-    # Etapa 6: Normalização de espaços em branco
-    # Substitui múltiplos espaços, tabulações, etc., por um único espaço e remove espaços no início/fim.
-    normalized_text = re.sub(r'\s+', ' ', normalized_text).strip()
-
-    return normalized_text
+    # As etapas abaixo são executadas por CompiledNormalizer.normalize; o
+    # dicionário é compilado uma única vez e reaproveitado entre chamadas.
+    #
+    # Etapa 1: junta palavras hifenizadas no fim da linha ("gradua-\nção" -> "graduação")
+    #          e troca quebras de linha por espaço.
+    # Etapa 2: expansão de siglas e padronização numa única passada (regex em trie),
+    #          chave mais longa primeiro, palavra inteira (\b), sem diferenciar caixa.
+    #          A padronização vem primeiro no mapa combinado; siglas têm precedência.
+    # Etapas 3 e 4: minúsculas e remoção de acentos (unidecode).
+    # Etapa 5: remoção de toda a pontuação de string.punctuation.
+    # Etapa 6: colapsa espaços em branco.
+    normalizer = get_normalizer(acronyms, standardization_map, profile)
+    return _normalize_cached(normalizer, raw_text, _resolve_cache(cache))
+
+def iter_normalize_text(
+    text_blocks,
+    acronyms: dict = None,
+    standardization_map: dict = None,
+    cache=None
+):
+    """
+    Versão em fluxo de normalize_text: consome blocos {"text", "page"} (por
+    exemplo de extract_raw.iter_raw_blocks) e gera o texto normalizado de cada
+    um, sem concatenar o documento inteiro numa única string.
+    """
+    normalizer = get_normalizer(acronyms, standardization_map)
+    cache = _resolve_cache(cache)
+    for block in text_blocks:
+        yield _normalize_cached(normalizer, block["text"], cache)
+
+
+# --- Backend multiprocessing de normalize_batch ---
+# Cada worker compila o normalizador uma única vez (initializer) e recebe
+# apenas fatias da lista de textos.
+_WORKER_NORMALIZER = None
+
+
+def _init_batch_worker(acronyms: dict, standardization_map: dict, profile: str):
+    global _WORKER_NORMALIZER
+    _WORKER_NORMALIZER = CompiledNormalizer(acronyms, standardization_map, profile)
+
+
+def _normalize_chunk(texts: list) -> list[str]:
+    return _WORKER_NORMALIZER.normalize_many(texts)
+
+
+def normalize_batch(
+    texts,
+    acronyms: dict = None,
+    standardization_map: dict = None,
+    profile: str = "padrao",
+    workers: int = None,
+    chunk_size: int = 2000,
+    cache=None
+) -> list[str]:
+    """
+    Normaliza uma lista de textos reaproveitando UM pipeline compilado
+    (dicionários, minúsculas, unidecode, pontuação e espaços) para todos eles.
+    É a implementação usada pelo main.py e pelos notebooks.
+
+    Args:
+        texts (list[str]): Textos brutos (valores que não são str viram "").
+        acronyms, standardization_map (dict): Dicionários de normalização.
+        profile (str): "padrao" (normalize_text) ou "rag" (notebooks).
+        workers (int): Com mais de 1, divide os textos em fatias de 'chunk_size'
+                       e normaliza em paralelo num pool de processos. Só vale
+                       a pena para dezenas de milhares de blocos.
+        chunk_size (int): Tamanho das fatias enviadas a cada worker.
+        cache (NormalizationCache): Textos já vistos (e repetidos dentro da
+                                    própria lista) são normalizados uma única
+                                    vez. None usa o cache padrão; False desativa.
+
+    Returns:
+        list[str]: Textos normalizados, na mesma ordem da entrada.
+    """
+    texts = list(texts)
+    normalizer = get_normalizer(acronyms, standardization_map, profile)
+    cache = _resolve_cache(cache)
+    if cache is None:
+        return _normalize_uncached(normalizer, texts, workers, chunk_size)
+
+    # Consulta o cache e normaliza só os textos distintos que faltarem
+    results = [""] * len(texts)
+    pending = {}
+    for i, text in enumerate(texts):
+        if not isinstance(text, str):
+            continue
+        if text in pending:
+            pending[text].append(i)
+            cache.hits += 1
+            continue
+        normalized = cache.get(normalizer.fingerprint, text)
+        if normalized is None:
+            pending[text] = [i]
+        else:
+            results[i] = normalized
+
+    missing = list(pending)
+    for text, normalized in zip(missing, _normalize_uncached(normalizer, missing, workers, chunk_size)):
+        cache.put(normalizer.fingerprint, text, normalized)
+        for i in pending[text]:
+            results[i] = normalized
+    return results
+
+
+def _normalize_uncached(normalizer: CompiledNormalizer, texts: list, workers: int, chunk_size: int) -> list[str]:
+    if not workers or workers <= 1 or len(texts) <= chunk_size:
+        return normalizer.normalize_many(texts)
+
+    acronyms, standardization_map, profile = normalizer.acronyms, normalizer.standardization_map, normalizer.profile
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    normalized = []
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        initializer=_init_batch_worker,
+        initargs=(acronyms, standardization_map, profile)
+    ) as executor:
+        # executor.map devolve as fatias na ordem de envio
+        for chunk_result in executor.map(_normalize_chunk, chunks):
+            normalized.extend(chunk_result)
+    return normalized
@@ -0,0 +1,100 @@
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+
+class PdfDocumentSession:
+    """
+    Abre um PDF UMA única vez (pdfplumber) e compartilha entre as etapas do
+    pipeline os objetos de página (com o layout em cache) e os metadados.
+
+    Todas as etapas (extract_raw, detect_structure, extract_tables,
+    enrich_metadata) aceitam esta sessão no lugar do caminho do arquivo.
+    O Camelot só trabalha com caminhos, então extract_tables usa 'session.path'.
+
+    Uso:
+        with PdfDocumentSession("data/input/arquivo.pdf") as session:
+            blocos = extract_raw(session)
+            meta = enrich_metadata(estrutura, session)
+    """
+
+    def __init__(self, pdf_path: Union[str, Path]):
+        self.path = str(pdf_path)
+        self._pdf = None
+
+    # --- Abertura preguiçosa ---
+    @property
+    def pdf(self) -> pdfplumber.PDF:
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.path)
+        return self._pdf
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).name
+
+    @property
+    def stem(self) -> str:
+        return Path(self.path).stem
+
+    # --- Páginas (o pdfplumber já guarda o layout de cada Page em cache) ---
+    @property
+    def pages(self) -> List[pdfplumber.page.Page]:
+        return self.pdf.pages
+
+    @property
+    def page_count(self) -> int:
+        # Enquanto as páginas não foram montadas, lê o /Count da raiz da árvore
+        # de páginas (não percorre o documento inteiro)
+        if not hasattr(self.pdf, "_pages"):
+            try:
+                return int(resolve1(resolve1(self.pdf.doc.catalog["Pages"])["Count"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return len(self.pages)
+
+    # --- Metadados (dicionário /Info já decodificado pelo pdfplumber) ---
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.pdf.metadata or {}
+
+    # --- Ciclo de vida ---
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def __enter__(self) -> "PdfDocumentSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"PdfDocumentSession('{self.path}')"
+
+
+@contextmanager
+def open_session(source: Union[str, Path, PdfDocumentSession]):
+    """
+    Aceita um caminho ou uma sessão já aberta.
+    Só fecha a sessão ao final se ela tiver sido aberta aqui.
+    """
+    if isinstance(source, PdfDocumentSession):
+        yield source
+        return
+
+    session = PdfDocumentSession(source)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def source_path(source: Union[str, Path, PdfDocumentSession]) -> str:
+    """Caminho do arquivo, seja 'source' um caminho ou uma sessão."""
+    if isinstance(source, PdfDocumentSession):
+        return source.path
+    return str(source)
@@ -5,6 +5,8 @@ from typing import List, Dict, Any, Tuple
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter # <-- Importa o fatiador
 
+from jsonl_io import TIPO_CABECALHO
+
 # --- Classe StatsTracker (Sem mudanças) ---
 class StatsTracker:
     def __init__(self, file_name: str):
@@ -67,6 +69,11 @@ def load_and_process_jsons(json_folder_path: str = "data/output_blocos/") -> Tup
                 for line in f:
                     try:
                         linha_json = json.loads(line)
+                        # Formato compacto (jsonl_io.JsonlWriter): o cabeçalho com os
+                        # metadados do documento não é um bloco; as linhas de bloco
+                        # têm todos os campos usados aqui nos dois formatos
+                        if linha_json.get("tipo_registro") == TIPO_CABECALHO:
+                            continue
                         tipo_bloco = linha_json.get("tipo", "paragrafo")
                         if tipo_bloco in tipos_para_ignorar:
                             tracker.log_bloco_ignorado(tipo_bloco)
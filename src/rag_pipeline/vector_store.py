@@ -1,33 +1,98 @@
 import os
 from typing import List
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores.faiss import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+
+from embedding_cache import EmbeddingCache
+from encoder_backend import EncodingStats, encode_normalized, load_sentence_encoder
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Envolve um modelo de embeddings do LangChain com o EmbeddingCache em disco:
+    os documentos (chunks) já codificados numa execução anterior não passam de
+    novo pelo modelo. As perguntas (embed_query) vão direto ao modelo.
+
+    close() (ou um bloco 'with') fecha a conexão sqlite do cache; depois disso
+    os documentos também vão direto ao modelo.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self.embeddings.embed_documents(texts)
+        vectors = self.cache.encode(self.model_name, texts, self.embeddings.embed_documents)
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def __enter__(self) -> "CachedEmbeddings":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class SentenceEncoderEmbeddings(Embeddings):
+    """
+    Adapta um SentenceTransformer carregado por encoder_backend à interface de
+    embeddings do LangChain, com vetores normalizados. Os documentos vão ao
+    modelo em lotes por orçamento de tokens (chunks curtos e de 1500 caracteres
+    não dividem o mesmo lote); 'stats' acumula tokens/s.
+    """
+
+    def __init__(self, encoder, max_tokens: int = 4096):
+        self.encoder = encoder
+        self.max_tokens = max_tokens
+        self.stats = EncodingStats()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = encode_normalized(self.encoder, list(texts), max_tokens=self.max_tokens, stats=self.stats)
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return encode_normalized(self.encoder, [text])[0].tolist()
 
 # --- FUNÇÃO 1: Carregar o Modelo de Embedding ---
-def get_embedding_model():
+def get_embedding_model(cache_dir: str = None, backend: str = "torch", threads: int = None,
+                        onnx_file_name: str = None, max_tokens: int = 4096):
     """
     Retorna o modelo de embeddings em português.
+    Com 'cache_dir', os embeddings dos documentos ficam no cache em disco
+    compartilhado com a deduplicação (embedding_cache.EmbeddingCache).
+    'backend' ("torch", "torch-int8" ou "onnx") e 'threads' escolhem a
+    inferência na CPU (ver encoder_backend.load_sentence_encoder); 'max_tokens'
+    é o orçamento de tokens por lote de documentos.
+    Com 'cache_dir' o retorno é um CachedEmbeddings: chame close() quando a
+    indexação terminar (as perguntas não usam o cache).
     """
     model_name = "neuralmind/bert-base-portuguese-cased" 
-    print(f"🔤 Carregando modelo de embeddings: {model_name}")
+    print(f"🔤 Carregando modelo de embeddings: {model_name} (backend: {backend})")
 
-    model_kwargs = {'device': 'cpu'}
-    encode_kwargs = {'normalize_embeddings': True}
-
-    embeddings = HuggingFaceEmbeddings(
-        model_name=model_name,
-        model_kwargs=model_kwargs,
-        encode_kwargs=encode_kwargs
-    )
+    encoder = load_sentence_encoder(model_name, backend=backend, threads=threads,
+                                    device='cpu', onnx_file_name=onnx_file_name)
+    embeddings = SentenceEncoderEmbeddings(encoder, max_tokens=max_tokens)
 
     print("  [RAG VectorStore] Modelo de embedding carregado (na CPU).")
+    if cache_dir:
+        print(f"  [RAG VectorStore] Usando cache de embeddings em: '{cache_dir}'")
+        return CachedEmbeddings(embeddings, encoder.cache_name, EmbeddingCache(cache_dir))
     return embeddings
 
 # --- FUNÇÕES 2 e 3: Criar ou Carregar o Índice ---
 def _create_and_save_faiss_index(
     documents: List[Document], 
-    embedding_model: HuggingFaceEmbeddings, 
+    embedding_model: Embeddings, 
     index_path: str
 ) -> FAISS:
     print(f"  [RAG VectorStore] Criando novo índice FAISS em: '{index_path}'")
@@ -35,10 +100,14 @@ def _create_and_save_faiss_index(
     index = FAISS.from_documents(documents, embedding_model)
     index.save_local(index_path)
     print(f"    -> Índice FAISS criado e salvo com sucesso.")
+    # Vazão do modelo (para ajustar max_tokens); com o cache, só os textos novos contam
+    stats = getattr(embedding_model, "stats", None) or getattr(getattr(embedding_model, "embeddings", None), "stats", None)
+    if stats is not None and stats.texts:
+        print(f"    -> Embeddings: {stats.report()}")
     return index
 
 def _load_faiss_index(
-    embedding_model: HuggingFaceEmbeddings, 
+    embedding_model: Embeddings, 
     index_path: str
 ) -> FAISS:
     print(f"  [RAG VectorStore] Carregando índice FAISS existente de: '{index_path}'")
@@ -53,7 +122,7 @@ def _load_faiss_index(
 # --- FUNÇÃO 4: Ponto de Entrada ---
 def get_vector_store(
     documents: List[Document], 
-    embedding_model: HuggingFaceEmbeddings, 
+    embedding_model: Embeddings, 
     index_path: str = "faiss_index"
 ) -> FAISS: # <-- MUDANÇA: Retorna FAISS, não um retriever
     
@@ -1,5 +1,106 @@
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+# --- Regras estruturais (usadas por detect_structure e na classificação de títulos) ---
+# Cada regra é (nome, padrão, flags, categoria). Os padrões podem definir os
+# grupos nomeados 'rotulo' e 'texto'; todas as regras são combinadas numa ÚNICA
+# regex com um grupo nomeado por regra, compilada uma vez, e a primeira regra
+# (na ordem da lista) que casar no início da linha vence — o mesmo resultado de
+# testar os padrões um a um, com uma única varredura por bloco.
+#
+# 'categoria' diz como detect_structure trata a linha:
+#   "artigo"    -> abre um novo artigo (rotulo = "Art. 5º", texto = resto da linha)
+#   "paragrafo" -> parágrafo numerado / inciso (rotulo = "§ 1º", "I -", ...)
+#   "texto"     -> texto comum do artigo corrente (ou parágrafo solto)
+REGRAS_ESTRUTURAIS: List[Tuple[str, str, int, str]] = [
+    ("artigo", r"(?P<rotulo>art\.?\s*\d+º?)(?P<texto>.*)", re.IGNORECASE, "artigo"),
+    ("paragrafo", r"(?P<rotulo>§\s*\d+º|parágrafo único|\b[ivxlcdm]+\s*[-–—])\s*(?P<texto>.*)", re.IGNORECASE, "paragrafo"),
+    # Títulos das regras de classificação do unstructured (titulo_1 / titulo_2).
+    # Em detect_structure continuam sendo texto comum do artigo corrente.
+    ("capitulo", r"(?P<rotulo>CAPÍTULO\s[IVXLC]+)(?P<texto>.*)", 0, "texto"),
+    ("secao", r"(?P<rotulo>\d\.\d)\s(?P<texto>.*)", 0, "texto"),
+]
+
+
+def _flags_inline(flags: int) -> str:
+    letras = ""
+    if flags & re.IGNORECASE:
+        letras += "i"
+    if flags & re.DOTALL:
+        letras += "s"
+    if flags & re.MULTILINE:
+        letras += "m"
+    return letras
+
+
+class ClassificadorEstrutural:
+    """
+    Classifica uma linha com UMA chamada de match sobre a regex combinada de
+    todas as regras estruturais. Regras extras (plug-ins) podem ser registradas
+    com 'registrar_regra'; a regex combinada é recompilada uma única vez.
+
+    Uso:
+        classificador = ClassificadorEstrutural()
+        nome, categoria, rotulo, texto = classificador.classificar("Art. 5º O aluno ...")
+        # -> ("artigo", "artigo", "Art. 5º", " O aluno ...")
+    """
+
+    def __init__(self, regras: Optional[List[Tuple[str, str, int, str]]] = None):
+        self.regras = list(REGRAS_ESTRUTURAIS if regras is None else regras)
+        self._compilar()
+
+    def _compilar(self):
+        partes = []
+        self._categorias = {}
+        for nome, padrao, flags, categoria in self.regras:
+            if not nome.isidentifier():
+                raise ValueError(f"Nome de regra estrutural inválido: '{nome}'.")
+            if categoria in ("artigo", "paragrafo") and "(?P<rotulo>" not in padrao:
+                raise ValueError(f"A regra '{nome}' (categoria '{categoria}') precisa do grupo (?P<rotulo>...).")
+            # Os grupos 'rotulo'/'texto' de cada regra ganham o nome da regra como
+            # prefixo, para não colidirem dentro da regex combinada
+            padrao = padrao.replace("(?P<rotulo>", f"(?P<{nome}__rotulo>").replace("(?P<texto>", f"(?P<{nome}__texto>")
+            letras = _flags_inline(flags)
+            if letras:
+                padrao = f"(?{letras}:{padrao})"
+            partes.append(f"(?P<{nome}>{padrao})")
+            self._categorias[nome] = categoria
+        self._padrao = re.compile("|".join(partes)) if partes else None
+
+    def registrar_regra(self, nome: str, padrao: str, flags: int = 0, categoria: str = "texto", antes: Optional[str] = None):
+        """
+        Adiciona uma regra (plug-in). Por padrão ela entra no fim da lista (menor
+        prioridade); com 'antes', entra antes da regra de mesmo nome.
+        """
+        regra = (nome, padrao, flags, categoria)
+        if antes is None:
+            self.regras.append(regra)
+        else:
+            posicao = [r[0] for r in self.regras].index(antes)
+            self.regras.insert(posicao, regra)
+        self._compilar()
+
+    def classificar(self, linha: str) -> Tuple[str, str, Optional[str], str]:
+        """
+        Retorna (nome da regra, categoria, rótulo, texto). Linhas que não casam
+        com nenhuma regra voltam como ("texto", "texto", None, linha).
+        """
+        match = self._padrao.match(linha) if self._padrao is not None else None
+        if match is None:
+            return "texto", "texto", None, linha
+        # O grupo externo de cada regra é o último a fechar, então lastgroup é o nome da regra
+        nome = match.lastgroup
+        grupos = match.groupdict()
+        return nome, self._categorias[nome], grupos.get(f"{nome}__rotulo"), grupos.get(f"{nome}__texto") or ""
+
+
+# Classificador padrão (compilado uma vez, na importação do módulo)
+CLASSIFICADOR_ESTRUTURAL = ClassificadorEstrutural()
+
+
+def registrar_regra_estrutural(nome: str, padrao: str, flags: int = 0, categoria: str = "texto", antes: Optional[str] = None):
+    """Registra uma regra (plug-in) no classificador padrão usado por detect_structure."""
+    CLASSIFICADOR_ESTRUTURAL.registrar_regra(nome, padrao, flags=flags, categoria=categoria, antes=antes)
 
 def atualizar_contexto_estrutural(contexto_atual: Dict[str, Any], tipo_elemento: str, texto_elemento: str) -> Dict[str, Any]:
     """
@@ -33,10 +134,10 @@ def classificar_elemento_unstructured(el) -> str:
 
     # 2. O que queremos CLASSIFICAR
     if categoria == 'Title':
-        texto = el.text
-        if re.match(r"^CAPÍTULO\s[IVXLC]+", texto):
+        nome_regra = CLASSIFICADOR_ESTRUTURAL.classificar(el.text)[0]
+        if nome_regra == "capitulo":
              return "titulo_1"
-        if re.match(r"^\d\.\d\s", texto):
+        if nome_regra == "secao":
              return "titulo_2"
         return "titulo_desconhecido" 
     
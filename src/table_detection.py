@@ -0,0 +1,172 @@
+from collections import Counter, defaultdict
+
+from pdf_session import PdfDocumentSession, open_session
+
+
+def _ruling_lines(page, min_length: float = 10.0, x_tol: float = 4.0) -> tuple[int, int, int]:
+    """
+    Conta as linhas de grade da página (objetos 'line' e bordas dos 'rect' do
+    pdfplumber), agrupadas pela posição: quantos 'y' distintos têm traços
+    horizontais e quantos 'x' distintos têm traços verticais. Também conta
+    quantos traços horizontais têm exatamente a mesma extensão (x0, x1), como
+    as linhas de uma tabela; sublinhados de texto variam de tamanho.
+    Retângulos do tamanho da página (fundo/moldura) são ignorados.
+    """
+    horizontal, vertical = set(), set()
+    spans = defaultdict(set)
+
+    def _add_segment(x0, top, x1, bottom):
+        if x1 - x0 >= min_length and bottom - top < 2:
+            horizontal.add(round(top))
+            spans[(round(x0 / x_tol), round(x1 / x_tol))].add(round(top))
+        elif bottom - top >= min_length and x1 - x0 < 2:
+            vertical.add(round(x0))
+
+    for line in page.lines:
+        _add_segment(line["x0"], line["top"], line["x1"], line["bottom"])
+    for rect in page.rects:
+        x0, top, x1, bottom = rect["x0"], rect["top"], rect["x1"], rect["bottom"]
+        if x1 - x0 >= 0.9 * page.width and bottom - top >= 0.9 * page.height:
+            continue
+        if bottom - top < 2 or x1 - x0 < 2:
+            # Retângulo fino desenhado como linha
+            _add_segment(x0, top, x1, bottom)
+            continue
+        for y in (top, bottom):
+            _add_segment(x0, y, x1, y)
+        for x in (x0, x1):
+            _add_segment(x, top, x, bottom)
+    same_span = max((len(ys) for ys in spans.values()), default=0)
+    return len(horizontal), len(vertical), same_span
+
+
+def _text_rows(words, y_tol: float = 3.0) -> list[list[dict]]:
+    """Agrupa as palavras em linhas de texto (ordenadas da esquerda para a direita)."""
+    rows = []
+    for word in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if rows and word["top"] - rows[-1][0]["top"] <= y_tol:
+            rows[-1].append(word)
+        else:
+            rows.append([word])
+    for row in rows:
+        row.sort(key=lambda w: w["x0"])
+    return rows
+
+
+def _aligned_columns(words, min_gap: float = 15.0, min_rows: int = 3, x_tol: float = 4.0) -> tuple[int, int]:
+    """
+    Procura uma grade de texto (tabelas sem linhas, o caso do flavor 'stream'):
+    linhas com lacunas largas entre palavras cujas 'células' começam nas mesmas
+    posições x em várias linhas. Retorna (linhas com lacunas, colunas alinhadas),
+    onde uma coluna alinhada é um início de célula (fora a margem esquerda)
+    repetido em pelo menos 'min_rows' linhas.
+    """
+    gapped_rows = 0
+    column_starts = Counter()
+    for row in _text_rows(words):
+        starts = set()
+        for previous, word in zip(row, row[1:]):
+            if word["x0"] - previous["x1"] >= min_gap:
+                starts.add(round(word["x0"] / x_tol))
+        if starts:
+            gapped_rows += 1
+            column_starts.update(starts)
+    aligned = sum(1 for count in column_starts.values() if count >= min_rows)
+    return gapped_rows, aligned
+
+
+def page_table_signals(page) -> dict:
+    """Sinais baratos de presença de tabela em uma página do pdfplumber."""
+    horizontal, vertical, same_span = _ruling_lines(page)
+    gapped_rows, aligned_columns = _aligned_columns(page.extract_words())
+    return {
+        "linhas_horizontais": horizontal,
+        "linhas_verticais": vertical,
+        "linhas_mesma_extensao": same_span,
+        "linhas_com_lacunas": gapped_rows,
+        "colunas_alinhadas": aligned_columns,
+    }
+
+
+class _FitzPageAdapter:
+    """
+    Expõe uma página do PyMuPDF (fitz) com os atributos do pdfplumber usados
+    aqui (lines, rects, width, height, extract_words), para reaproveitar as
+    mesmas heurísticas onde o documento já está aberto com o fitz.
+    """
+
+    def __init__(self, page):
+        self.width, self.height = page.rect.width, page.rect.height
+        self.lines, self.rects = [], []
+        for drawing in page.get_drawings():
+            for item in drawing["items"]:
+                if item[0] == "l":
+                    p1, p2 = item[1], item[2]
+                    self.lines.append({"x0": min(p1.x, p2.x), "x1": max(p1.x, p2.x),
+                                       "top": min(p1.y, p2.y), "bottom": max(p1.y, p2.y)})
+                elif item[0] == "re":
+                    rect = item[1]
+                    self.rects.append({"x0": rect.x0, "x1": rect.x1, "top": rect.y0, "bottom": rect.y1})
+        self._words = [{"x0": w[0], "top": w[1], "x1": w[2], "bottom": w[3], "text": w[4]}
+                       for w in page.get_text("words")]
+
+    def extract_words(self):
+        return self._words
+
+
+def fitz_page_table_signals(page) -> dict:
+    """page_table_signals para uma página do PyMuPDF (fitz)."""
+    return page_table_signals(_FitzPageAdapter(page))
+
+
+def is_table_page(signals: dict, min_horizontal: int = 3, min_vertical: int = 3,
+                  min_ruled_rows: int = 6, min_gapped_rows: int = 3, min_aligned_columns: int = 2) -> bool:
+    """
+    Decide se a página provavelmente tem tabela:
+      - grade desenhada (lattice): traços horizontais E verticais suficientes
+        para ao menos duas colunas (uma caixa de cabeçalho tem só 2 verticais);
+      - tabela só com traços horizontais de mesma extensão entre as linhas,
+        com texto em colunas; ou
+      - grade de texto (stream): várias linhas com lacunas largas e ao menos
+        'min_aligned_columns' colunas alinhadas entre elas.
+    """
+    horizontal, vertical = signals["linhas_horizontais"], signals["linhas_verticais"]
+    gapped_rows = signals["linhas_com_lacunas"]
+    if horizontal >= min_horizontal and vertical >= min_vertical:
+        return True
+    if signals["linhas_mesma_extensao"] >= min_ruled_rows and gapped_rows >= min_gapped_rows:
+        return True
+    return gapped_rows >= min_gapped_rows and signals["colunas_alinhadas"] >= min_aligned_columns
+
+
+def find_table_pages(pdf_path, release_pages: bool = None, **thresholds) -> list[int]:
+    """
+    Pré-varredura barata (só pdfplumber, sem OpenCV) que marca as páginas que
+    provavelmente contêm tabelas. Retorna os números das páginas (começando em 1).
+    'pdf_path' pode ser um caminho ou uma PdfDocumentSession. Com
+    'release_pages', o layout de cada página é liberado (page.close()) depois
+    de medido, para a varredura não acumular o documento. Por padrão só
+    quando a sessão é aberta aqui: as páginas de uma sessão recebida ficam em
+    cache para as outras etapas (como em extract_raw.iter_raw_blocks).
+    """
+    pages = []
+    if release_pages is None:
+        release_pages = not isinstance(pdf_path, PdfDocumentSession)
+    with open_session(pdf_path) as session:
+        for page_num, page in enumerate(session.pages, start=1):
+            if is_table_page(page_table_signals(page), **thresholds):
+                pages.append(page_num)
+            if release_pages:
+                page.close()
+    return pages
+
+
+def pages_spec(pages) -> str:
+    """Converte [1, 2, 3, 7] no formato de páginas do Camelot: "1-3,7"."""
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)